@@ -425,7 +425,8 @@ with st.sidebar:
                         depth_mm=payload.get("depth_mm"),
                         velocity_mps=payload.get("velocity_mps"),
                         flow_lps=payload.get("flow_lps"),
-                        allow_storage=True
+                        allow_storage=True,
+                        timestamp=ts,
                     )
                     if stored:
                         get_cached_measurements.clear()
@@ -517,6 +517,26 @@ class AuthDatabase:
             finally:
                 conn.close()
 
+    def user_exists(self, username: str) -> bool:
+        """Check whether a username is taken, without verifying any password."""
+        if self.use_postgres:
+            conn = psycopg2.connect(self.pg_dsn)
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1 FROM users WHERE username = %s LIMIT 1", (username,))
+                return cur.fetchone() is not None
+            finally:
+                cur.close()
+                conn.close()
+        else:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1 FROM users WHERE username = ? LIMIT 1", (username,))
+                return cursor.fetchone() is not None
+            finally:
+                conn.close()
+
     def list_users(self) -> List[Dict]:
         """List all users (admin only)."""
         if self.use_postgres:
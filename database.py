@@ -63,6 +63,16 @@ class FlowDatabase:
             _migrate_legacy_db(self.db_path)
         self.init_db()
 
+    def _sqlite_connect(self) -> sqlite3.Connection:
+        """Open a SQLite connection with the per-connection pragmas applied.
+
+        ``journal_mode=WAL`` persists in the file once set by ``init_db``, but
+        ``synchronous`` resets to FULL on every new connection.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     def init_db(self):
         """Initialize the database with required tables."""
         if self.use_postgres:
@@ -268,12 +278,11 @@ class FlowDatabase:
             cur.close()
             conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
 
             # Enable WAL mode for better concurrency and reliability
             cursor.execute("PRAGMA journal_mode=WAL")
-            cursor.execute("PRAGMA synchronous=NORMAL")
 
             # Create table for device information
             cursor.execute(
@@ -510,7 +519,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -559,7 +568,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -593,7 +602,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute("SELECT value FROM system_settings WHERE key = ?", (key,))
@@ -624,7 +633,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -657,7 +666,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -673,6 +682,104 @@ class FlowDatabase:
             finally:
                 conn.close()
 
+    def add_device_measurement(self, device_id: str, device_name: str, timestamp: datetime,
+                               depth_mm: float = None, velocity_mps: float = None,
+                               flow_lps: float = None) -> bool:
+        """Ensure the device row exists and add a measurement in one transaction.
+
+        Unlike ``add_device`` this never overwrites an existing device's name,
+        location or URL; it only inserts the device if it is missing.
+        Returns True if a new measurement row was inserted.
+        """
+        if self.use_postgres:
+            conn = psycopg2.connect(self.pg_dsn)
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    INSERT INTO devices (device_id, device_name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (device_id) DO NOTHING
+                    """,
+                    (device_id, device_name),
+                )
+                cur.execute(
+                    """
+                    INSERT INTO measurements (device_id, timestamp, depth_mm, velocity_mps, flow_lps)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (device_id, timestamp) DO NOTHING
+                    """,
+                    (device_id, timestamp, depth_mm, velocity_mps, flow_lps),
+                )
+                inserted = cur.rowcount > 0
+                conn.commit()
+                return inserted
+            finally:
+                cur.close()
+                conn.close()
+        else:
+            conn = self._sqlite_connect()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO devices (device_id, device_name) VALUES (?, ?)",
+                    (device_id, device_name),
+                )
+                cursor.execute(
+                    """
+                    INSERT OR IGNORE INTO measurements 
+                    (device_id, timestamp, depth_mm, velocity_mps, flow_lps)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (device_id, timestamp, depth_mm, velocity_mps, flow_lps),
+                )
+                inserted = cursor.rowcount > 0
+                conn.commit()
+                return inserted
+            finally:
+                conn.close()
+
+    def add_devices_bulk(self, rows: List[tuple]) -> int:
+        """Insert multiple ``(device_id, device_name, location)`` rows in one transaction.
+
+        Devices that already exist are left untouched.  Returns the number of
+        rows actually inserted, or 0 immediately if *rows* is empty.
+        """
+        if not rows:
+            return 0
+        if self.use_postgres:
+            conn = psycopg2.connect(self.pg_dsn)
+            cur = conn.cursor()
+            try:
+                cur.executemany(
+                    """
+                    INSERT INTO devices (device_id, device_name, location)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (device_id) DO NOTHING
+                    """,
+                    rows,
+                )
+                conn.commit()
+                return cur.rowcount
+            finally:
+                cur.close()
+                conn.close()
+        else:
+            conn = self._sqlite_connect()
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(
+                    """
+                    INSERT OR IGNORE INTO devices (device_id, device_name, location)
+                    VALUES (?, ?, ?)
+                    """,
+                    rows,
+                )
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+
     def bulk_add_measurements(self, records: List[Dict]) -> int:
         """Insert multiple measurement records in a single batch operation.
 
@@ -712,7 +819,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.executemany(
@@ -763,7 +870,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             if device_id:
@@ -806,7 +913,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM devices ORDER BY created_at ASC")
@@ -827,7 +934,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM devices")
             count = cursor.fetchone()[0]
@@ -847,13 +954,38 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM measurements")
             count = cursor.fetchone()[0]
             conn.close()
             return count
 
+    def get_latest_measurement(self) -> Optional[Dict]:
+        """Get the most recent measurement across all devices."""
+        query = (
+            "SELECT device_id, timestamp, depth_mm, velocity_mps, flow_lps "
+            "FROM measurements ORDER BY timestamp DESC LIMIT 1"
+        )
+        if self.use_postgres:
+            conn = psycopg2.connect(self.pg_dsn)
+            cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            try:
+                cur.execute(query)
+                row = cur.fetchone()
+                return dict(row) if row else None
+            finally:
+                cur.close()
+                conn.close()
+        else:
+            conn = self._sqlite_connect()
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(query)
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+
     def delete_all_data(self):
         """Delete all data from the database (for fresh start)."""
         if self.use_postgres:
@@ -867,7 +999,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM measurements")
             cursor.execute("DELETE FROM devices")
@@ -900,7 +1032,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             try:
                 conn.execute("DELETE FROM device_rainfall_stations WHERE device_id = ?", (device_id,))
                 conn.execute("DELETE FROM anomaly_flags WHERE device_id = ?", (device_id,))
@@ -923,7 +1055,7 @@ class FlowDatabase:
         """
         if self.use_postgres:
             return  # Postgres handles durability natively
-        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn = self._sqlite_connect()
         try:
             conn.execute("PRAGMA wal_checkpoint(FULL)")
             conn.commit()
@@ -976,7 +1108,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.executemany(
@@ -1029,7 +1161,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             if include_overridden:
@@ -1083,7 +1215,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -1137,7 +1269,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -1182,7 +1314,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             if device_id:
@@ -1221,7 +1353,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -1253,7 +1385,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -1307,7 +1439,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.executemany(
@@ -1352,7 +1484,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM rainfall_stations")
@@ -1386,7 +1518,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
@@ -1425,7 +1557,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             try:
@@ -1472,7 +1604,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.executemany(
@@ -1525,7 +1657,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             if date_from and date_to:
@@ -1596,7 +1728,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             try:
                 conn.execute(
                     """
@@ -1637,7 +1769,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             try:
@@ -1711,7 +1843,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.executemany(
@@ -1770,7 +1902,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             try:
@@ -1829,7 +1961,7 @@ class FlowDatabase:
                 cur.close()
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn = self._sqlite_connect()
             cursor = conn.cursor()
             try:
                 cursor.execute(
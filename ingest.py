@@ -8,7 +8,6 @@ import asyncio
 import sys
 import logging
 from datetime import datetime
-import pytz
 
 from scraper import DataScraper
 from database import FlowDatabase
@@ -55,7 +54,8 @@ async def ingest_data():
                 depth_mm=depth_mm,
                 velocity_mps=velocity_mps,
                 flow_lps=flow_lps,
-                allow_storage=True
+                allow_storage=True,
+                timestamp=data.get("timestamp"),
             )
 
             if stored:
@@ -75,6 +75,7 @@ async def ingest_data():
         logger.error(f"❌ Error during data ingestion: {e}", exc_info=True)
         return 1
     finally:
+        await scraper.aclose()
         logger.info("=" * 50)
         logger.info("Data ingestion completed")
         logger.info("=" * 50)
@@ -19,8 +19,10 @@ import logging
 from logging.handlers import RotatingFileHandler
 import time
 import signal
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from zoneinfo import ZoneInfo
 import atexit
 
 try:
@@ -28,7 +30,6 @@ try:
 except ImportError:  # pragma: no cover - non-Unix
     fcntl = None
 
-import pytz
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
@@ -61,6 +62,7 @@ RETRY_DELAY = 5  # Seconds between retries
 HEALTH_CHECK_INTERVAL = 300  # Health check every 5 minutes
 
 DEFAULT_TZ = "Australia/Brisbane"
+_TZ = ZoneInfo(DEFAULT_TZ)
 LOCK_FILE_PATH = Path(os.getenv("E_FLOW_MONITOR_LOCK", "/tmp/e-flow-monitor.lock"))
 
 
@@ -145,6 +147,11 @@ class ContinuousMonitor:
         self.scraper.last_data = {}
         self.scraper._save_state()
         self.scheduler = BlockingScheduler()
+        # One event loop for the life of the monitor so the scraper's shared
+        # Playwright browser (bound to the loop that launched it) is reused.
+        self._loop = asyncio.new_event_loop()
+        # Held while a scheduler worker drives the loop, so shutdown can wait for it
+        self._loop_lock = threading.Lock()
         self.check_count = 0
         self.update_count = 0
         self.error_count = 0
@@ -157,6 +164,12 @@ class ContinuousMonitor:
         self._current_interval = self._load_poll_interval()
         # Track per-device last-poll time so each device can have its own interval
         self._device_last_poll: dict = {}
+        # config.py devices are static for the process lifetime; resolve their settings once
+        self._config_devices = [
+            (device_id, info.get("name", device_id), info.get("url", MONITOR_URL),
+             info.get("selectors", DEFAULT_SELECTORS))
+            for device_id, info in DEVICES.items()
+        ]
 
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._handle_shutdown)
@@ -195,7 +208,7 @@ class ContinuousMonitor:
             return
 
         devices = self.db.get_devices()
-        now = datetime.now(pytz.timezone(DEFAULT_TZ))
+        now = datetime.now(_TZ)
         date_from = now - timedelta(hours=48)
         date_to = now
 
@@ -252,7 +265,7 @@ class ContinuousMonitor:
                     last = _pd.to_datetime(existing["computed_at"], utc=True, errors="coerce")
                     if last is not _pd.NaT:
                         age_h = (
-                            datetime.now(pytz.utc) - last.to_pydatetime()
+                            datetime.now(timezone.utc) - last.to_pydatetime()
                         ).total_seconds() / 3600.0
                         if age_h < 20:
                             skipped += 1
@@ -381,13 +394,16 @@ class ContinuousMonitor:
                     logger.warning(f"Could not parse flow value: {page_data.get('flow')} - {e}")
 
         if depth_mm is not None or velocity_mps is not None or flow_lps is not None:
-            stored = self.scraper.store_measurement(
+            # SQLite writes block; keep them off the event loop thread
+            stored = await asyncio.to_thread(
+                self.scraper.store_measurement,
                 device_id=device_id,
                 device_name=device_name,
                 depth_mm=depth_mm,
                 velocity_mps=velocity_mps,
                 flow_lps=flow_lps,
                 allow_storage=True,
+                timestamp=data.get("timestamp"),
             )
             if stored:
                 self.update_count += 1
@@ -410,7 +426,8 @@ class ContinuousMonitor:
             logger.info(f"[Check #{self.check_count}] Checking for data updates...")
 
             # ── Devices defined in config.py ────────────────────────────────
-            for device_id, device_info in DEVICES.items():
+            config_jobs = []
+            for device_id, device_name, device_url, device_selectors in self._config_devices:
                 device_interval = self._current_interval
                 last_poll = self._device_last_poll.get(device_id)
                 if last_poll is not None:
@@ -420,14 +437,15 @@ class ContinuousMonitor:
                         continue
                 logger.info(f"  Checking device: {device_id}")
                 self._device_last_poll[device_id] = now
-                await self._scrape_device(
+                config_jobs.append(self._scrape_device(
                     device_id=device_id,
-                    device_name=device_info.get("name", device_id),
-                    device_url=device_info.get("url", MONITOR_URL),
-                    device_selectors=device_info.get("selectors", DEFAULT_SELECTORS),
-                )
+                    device_name=device_name,
+                    device_url=device_url,
+                    device_selectors=device_selectors,
+                ))
 
             # ── Devices added via the Admin panel (DB-only) ─────────────────
+            db_jobs = []
             try:
                 db_devices = self.db.get_devices()
                 for db_device in db_devices:
@@ -453,15 +471,24 @@ class ContinuousMonitor:
                             continue
                     logger.info(f"  Checking DB device: {db_device_id}")
                     self._device_last_poll[db_device_id] = now
-                    await self._scrape_device(
+                    db_jobs.append(self._scrape_device(
                         device_id=db_device_id,
                         device_name=db_device.get("device_name", db_device_id),
                         device_url=dashboard_url,
                         device_selectors=DEFAULT_SELECTORS,
-                    )
+                    ))
             except Exception as e:
                 logger.error(f"Error checking DB-only devices: {e}", exc_info=True)
 
+            # Scrape every due device concurrently; the scraper bounds browser and HTTP concurrency
+            results = await asyncio.gather(*config_jobs, *db_jobs, return_exceptions=True)
+            for result in results[len(config_jobs):]:
+                if isinstance(result, Exception):
+                    logger.error(f"Error checking DB-only devices: {result}", exc_info=result)
+            for result in results[:len(config_jobs)]:
+                if isinstance(result, BaseException):
+                    raise result
+
         except Exception as e:
             logger.error(f"Error during check: {e}", exc_info=True)
             self.error_count += 1
@@ -506,7 +533,10 @@ class ContinuousMonitor:
     def run_check(self):
         """Wrapper to run async check from synchronous scheduler."""
         try:
-            asyncio.run(self.check_for_updates_with_retry())
+            with self._loop_lock:
+                if self._loop.is_closed():
+                    return
+                self._loop.run_until_complete(self.check_for_updates_with_retry())
             self.perform_health_check()
             # Check whether the admin has changed the poll interval; reschedule if so
             self._apply_interval_if_changed()
@@ -531,6 +561,22 @@ class ContinuousMonitor:
         except Exception as e:
             logger.warning(f"Could not apply interval change: {e}")
 
+    def _close_loop(self):
+        """Close the scraper's shared browser and the monitor's event loop.
+
+        scheduler.shutdown(wait=False) in the signal handler can return while a
+        worker is still running a check on the loop, so wait for it first.
+        """
+        with self._loop_lock:
+            try:
+                self._loop.run_until_complete(self.scraper.aclose())
+            except Exception as e:
+                logger.warning(f"Could not close scraper browser cleanly: {e}")
+            try:
+                self._loop.close()
+            except Exception as e:
+                logger.warning(f"Could not close event loop: {e}")
+
     def start_monitoring(self):
         """Start the continuous monitoring service with auto-restart capability."""
         if not MONITOR_ENABLED:
@@ -601,6 +647,7 @@ class ContinuousMonitor:
         except KeyboardInterrupt:
             pass
         finally:
+            self._close_loop()
             logger.info("\n" + "=" * 60)
             logger.info("MONITORING STOPPED")
             logger.info("=" * 60)
@@ -15,11 +15,110 @@ from pathlib import Path
 from auth import AuthDatabase
 from database import FlowDatabase
 from shared_styles import apply_styles, render_footer
-from streamlit_auth import init_auth_state, is_authenticated, is_admin, get_current_user, get_sidebar_logo_path, log_page_view
+from streamlit_auth import init_auth_state, is_authenticated, is_admin, get_current_user, get_sidebar_logo_path, log_page_view, clear_user_device_cache
 
 _ASSETS = Path(__file__).parent.parent / "assets"
 
 
+@st.fragment
+def _assignment_panel(auth_db: AuthDatabase, devices: list):
+    """Site-assignment panel; add/remove clicks rerun only this fragment."""
+    # Single batch query: users + their assigned device IDs/names in one round-trip
+    users = auth_db.list_users_with_devices()
+    # Build a lookup dict for O(1) device resolution by ID
+    device_map = {d['device_id']: d for d in devices}
+
+    if not users:
+        st.warning("No users available. Create a user first.")
+    elif not devices:
+        st.warning("No devices / sites available.")
+    else:
+        regular_users = [u for u in users if u['role'] == 'user']
+
+        if not regular_users:
+            st.info("All users are admins. Create a regular user to assign sites.")
+        else:
+            col_picker, col_info = st.columns([2, 1])
+
+            with col_picker:
+                selected_username = st.selectbox(
+                    "Select user to manage:",
+                    options=[u['username'] for u in regular_users],
+                    key="user_selector",
+                )
+                selected_user = {u['username']: u for u in regular_users}.get(selected_username)
+
+            if selected_user:
+                # Device IDs already fetched in the batch query — no extra DB call
+                user_device_ids = selected_user['device_ids']
+
+                with col_info:
+                    st.markdown(f"""
+                    <div class="info-box" style="margin-top: 1.65rem;">
+                        <strong>{selected_user['username']}</strong><br>
+                        <span style="color: #6b7280;">{len(user_device_ids)} site(s) currently assigned</span>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                col_avail, col_assigned = st.columns(2)
+
+                with col_avail:
+                    st.markdown(
+                        '<p style="font-weight:600;color:#4A4A4A;margin-bottom:0.5rem;">'
+                        '📭 Available Sites</p>',
+                        unsafe_allow_html=True,
+                    )
+                    assigned_set = set(user_device_ids)
+                    unassigned = [d for d in devices if d['device_id'] not in assigned_set]
+                    if unassigned:
+                        for device in unassigned:
+                            if st.button(
+                                f"＋ {device['device_name']}",
+                                key=f"add_{selected_user['user_id']}_{device['device_id']}",
+                                width='stretch',
+                            ):
+                                auth_db.assign_device_to_user(
+                                    selected_user['user_id'], device['device_id']
+                                )
+                                clear_user_device_cache()
+                                st.success(f"Added {device['device_name']}")
+                                st.rerun(scope="fragment")
+                    else:
+                        st.info("All sites already assigned.")
+
+                with col_assigned:
+                    st.markdown(
+                        '<p style="font-weight:600;color:#4A4A4A;margin-bottom:0.5rem;">'
+                        'Assigned Sites</p>',
+                        unsafe_allow_html=True,
+                    )
+                    if user_device_ids:
+                        for device_id in user_device_ids:
+                            device = device_map.get(device_id)
+                            if device:
+                                col_name, col_remove = st.columns([4, 1])
+                                with col_name:
+                                    st.markdown(
+                                        f'<p style="margin:0.45rem 0;font-size:0.9rem;">'
+                                        f'{device["device_name"]}</p>',
+                                        unsafe_allow_html=True,
+                                    )
+                                with col_remove:
+                                    if st.button(
+                                        "✕",
+                                        key=f"remove_{selected_user['user_id']}_{device_id}",
+                                        help=f"Remove {device['device_name']}",
+                                    ):
+                                        auth_db.unassign_device_from_user(
+                                            selected_user['user_id'], device_id
+                                        )
+                                        clear_user_device_cache()
+                                        st.toast(f"Removed {device['device_name']}")
+                                        st.rerun(scope="fragment")
+                    else:
+                        st.info("No sites assigned yet.")
+
+
 def render_admin_panel():
     """Render the admin management panel."""
     apply_styles()
@@ -122,6 +221,7 @@ def render_admin_panel():
         "2 minutes": 120,
         "5 minutes": 300,
     }
+    _FREQ_LABEL_BY_VALUE = {val: lbl for lbl, val in _FREQ_OPTIONS.items()}
 
     # ── Per-Site Collection Frequency ─────────────────────────────────────────
     st.markdown('<p class="section-title">Per-Site Collection Frequency</p>', unsafe_allow_html=True)
@@ -144,10 +244,7 @@ def render_admin_panel():
             _fs_interval = _fs.get("poll_interval")
 
             # Map current value to a label
-            _fs_current_label = next(
-                (lbl for lbl, val in _FREQ_OPTIONS.items() if val == _fs_interval),
-                "Use default",
-            )
+            _fs_current_label = _FREQ_LABEL_BY_VALUE.get(_fs_interval, "Use default")
 
             _fcol_name, _fcol_radio, _fcol_btn = st.columns([2, 3, 1])
             with _fcol_name:
@@ -480,7 +577,8 @@ def render_admin_panel():
                             st.error("Failed to save location.")
 
         # Rain gauge assignment — only enabled once coordinates are set
-        _site_refreshed = next((s for s in flow_db.get_devices() if s["device_id"] == _device_id), _site)
+        _sites_by_id = {s["device_id"]: s for s in flow_db.get_devices()}
+        _site_refreshed = _sites_by_id.get(_device_id, _site)
         _has_coords = bool(_site_refreshed.get("latitude") and _site_refreshed.get("longitude"))
 
         with st.expander("Assign Rain Gauge", expanded=False):
@@ -623,6 +721,7 @@ def render_admin_panel():
     _all_users_for_delete = auth_db.list_users_with_devices()
     # Prevent the currently logged-in admin from deleting their own account
     _deletable_users = [u for u in _all_users_for_delete if u['username'] != _current_user.get('username')]
+    _deletable_by_name = {u['username']: u for u in _deletable_users}
 
     if not _deletable_users:
         st.info("No other users to delete.")
@@ -633,10 +732,10 @@ def render_admin_panel():
             _del_user_sel = st.selectbox(
                 "Select user to delete:",
                 options=[u['username'] for u in _deletable_users],
-                format_func=lambda u: f"{u}  ({next(x['role'] for x in _deletable_users if x['username'] == u)})",
+                format_func=lambda u: f"{u}  ({_deletable_by_name[u]['role']})",
                 key="delete_user_selector",
             )
-            _del_user = next(u for u in _deletable_users if u['username'] == _del_user_sel)
+            _del_user = _deletable_by_name[_del_user_sel]
             _confirm_user = st.checkbox(
                 f"I understand this will permanently delete **{_del_user['username']}** "
                 "and all their session data. This cannot be undone.",
@@ -645,6 +744,7 @@ def render_admin_panel():
             if st.button("Delete User", disabled=not _confirm_user, key="delete_user_btn"):
                 ok = auth_db.delete_user(_del_user['user_id'])
                 if ok:
+                    clear_user_device_cache()
                     st.success(f"User '{_del_user['username']}' has been deleted.")
                     st.rerun()
                 else:
@@ -668,100 +768,11 @@ def render_admin_panel():
     # ── Assign Sites to Users ────────────────────────────────────────────────
     st.markdown('<p class="section-title">Assign Sites to Users</p>', unsafe_allow_html=True)
 
-    # Single batch query: users + their assigned device IDs/names in one round-trip
-    users = auth_db.list_users_with_devices()
     devices = flow_db.get_devices()
-    # Build a lookup dict for O(1) device resolution by ID
-    device_map = {d['device_id']: d for d in devices}
-
-    if not users:
-        st.warning("No users available. Create a user first.")
-    elif not devices:
-        st.warning("No devices / sites available.")
-    else:
-        regular_users = [u for u in users if u['role'] == 'user']
+    _assignment_panel(auth_db, devices)
 
-        if not regular_users:
-            st.info("All users are admins. Create a regular user to assign sites.")
-        else:
-            col_picker, col_info = st.columns([2, 1])
-
-            with col_picker:
-                selected_username = st.selectbox(
-                    "Select user to manage:",
-                    options=[u['username'] for u in regular_users],
-                    key="user_selector",
-                )
-                selected_user = next(
-                    (u for u in regular_users if u['username'] == selected_username), None
-                )
-
-            if selected_user:
-                # Device IDs already fetched in the batch query — no extra DB call
-                user_device_ids = selected_user['device_ids']
-
-                with col_info:
-                    st.markdown(f"""
-                    <div class="info-box" style="margin-top: 1.65rem;">
-                        <strong>{selected_user['username']}</strong><br>
-                        <span style="color: #6b7280;">{len(user_device_ids)} site(s) currently assigned</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                col_avail, col_assigned = st.columns(2)
-
-                with col_avail:
-                    st.markdown(
-                        '<p style="font-weight:600;color:#4A4A4A;margin-bottom:0.5rem;">'
-                        '📭 Available Sites</p>',
-                        unsafe_allow_html=True,
-                    )
-                    unassigned = [d for d in devices if d['device_id'] not in user_device_ids]
-                    if unassigned:
-                        for device in unassigned:
-                            if st.button(
-                                f"＋ {device['device_name']}",
-                                key=f"add_{selected_user['user_id']}_{device['device_id']}",
-                                width='stretch',
-                            ):
-                                auth_db.assign_device_to_user(
-                                    selected_user['user_id'], device['device_id']
-                                )
-                                st.success(f"Added {device['device_name']}")
-                                st.rerun()
-                    else:
-                        st.info("All sites already assigned.")
-
-                with col_assigned:
-                    st.markdown(
-                        '<p style="font-weight:600;color:#4A4A4A;margin-bottom:0.5rem;">'
-                        'Assigned Sites</p>',
-                        unsafe_allow_html=True,
-                    )
-                    if user_device_ids:
-                        for device_id in user_device_ids:
-                            device = device_map.get(device_id)
-                            if device:
-                                col_name, col_remove = st.columns([4, 1])
-                                with col_name:
-                                    st.markdown(
-                                        f'<p style="margin:0.45rem 0;font-size:0.9rem;">'
-                                        f'{device["device_name"]}</p>',
-                                        unsafe_allow_html=True,
-                                    )
-                                with col_remove:
-                                    if st.button(
-                                        "✕",
-                                        key=f"remove_{selected_user['user_id']}_{device_id}",
-                                        help=f"Remove {device['device_name']}",
-                                    ):
-                                        auth_db.unassign_device_from_user(
-                                            selected_user['user_id'], device_id
-                                        )
-                                        st.toast(f"Removed {device['device_name']}")
-                                        st.rerun()
-                    else:
-                        st.info("No sites assigned yet.")
+    # Users for the overview below (the assignment fragment re-queries its own)
+    users = auth_db.list_users_with_devices()
 
     st.markdown("<div style='height: 1.5rem'></div>", unsafe_allow_html=True)
 
@@ -223,7 +223,8 @@ def render_profile_page():
     else:
         user_device_ids = auth_db.get_user_devices(user['user_id'])
         all_devices = flow_db.get_devices()
-        assigned_devices = [d for d in all_devices if d['device_id'] in user_device_ids]
+        devices_by_id = {d['device_id']: d for d in all_devices}
+        assigned_devices = [devices_by_id[i] for i in user_device_ids if i in devices_by_id]
 
     if assigned_devices:
         st.caption(f"Access to **{len(assigned_devices)}** device(s).")
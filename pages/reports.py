@@ -22,6 +22,7 @@ from reporting import (
     compute_volume_breakdown,
     create_charts,
     build_pdf_report,
+    prepare_frame,
 )
 from shared_styles import apply_styles, render_footer
 from streamlit_auth import (
@@ -59,6 +60,50 @@ st.logo(get_sidebar_logo_path(), icon_image=str(_ASSETS / "logo_icon.svg"))
 DEFAULT_TZ = "Australia/Brisbane"
 db = FlowDatabase()
 
+
+def _selections_key(sel: ReportSelections) -> tuple:
+    """Hashable form of ReportSelections for use as a cache key."""
+    ar = sel.anomaly_report
+    return (
+        tuple(sel.variables), tuple(sel.calculations), sel.device_name,
+        sel.time_window_hours, sel.report_type, sel.site_id, sel.location,
+        (
+            ar.quality_label, ar.confidence_score,
+            tuple((f.index, str(f.timestamp), f.column, f.anomaly_type, f.severity, f.value)
+                  for f in ar.flags),
+        ) if ar is not None else None,
+        sel.include_stats_table, sel.include_charts, sel.include_volume_breakdown,
+        sel.volume_breakdown_interval, sel.report_timezone, sel.custom_title,
+    )
+
+
+_FINGERPRINT_COLS = ("timestamp", "depth_mm", "velocity_mps", "flow_lps")
+
+
+def _df_fingerprint(df: pd.DataFrame) -> tuple:
+    """Identity for a report window: row count, endpoints and a hash of the values.
+
+    The values are hashed so corrected or back-filled readings with the same
+    row count and endpoints still produce a fresh report.  Calculations and
+    the volume breakdown are derived from the same rows, so this covers them.
+    """
+    if df.empty:
+        return (0, None, None, 0)
+    cols = [c for c in _FINGERPRINT_COLS if c in df.columns]
+    content = int(pd.util.hash_pandas_object(df[cols], index=False).sum())
+    return (len(df), str(df["timestamp"].iloc[0]), str(df["timestamp"].iloc[-1]), content)
+
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner="Rendering report…")
+def _cached_pdf_report(device_name, df_key, selections_key, logo_path,
+                       _df, _selections, _calcs, _charts, _volume_breakdown):
+    """build_pdf_report keyed on fingerprints; underscored args are not hashed."""
+    return build_pdf_report(
+        device_name, _df, _selections, _calcs, _charts,
+        logo_path=logo_path,
+        volume_breakdown=_volume_breakdown,
+    )
+
 # ── Load devices (outside sidebar so they are accessible everywhere) ────────
 devices = db.get_devices()
 devices = filter_devices_for_user(devices)
@@ -258,14 +303,17 @@ with col_prev:
                 custom_title=custom_title.strip() if custom_title else "",
             )
 
-            calcs = compute_calculations(df_window, selections)
-            charts = create_charts(df_window, selections)
+            report_df = prepare_frame(df_window)
+            calcs = compute_calculations(report_df, selections)
+            charts = create_charts(report_df, selections)
 
             _logo_path = get_sidebar_logo_path()
-            pdf_bytes = build_pdf_report(
-                selected_device_name, df_window, selections, calcs, charts,
-                logo_path=_logo_path,
-                volume_breakdown=vol_breakdown,
+            pdf_bytes = _cached_pdf_report(
+                selected_device_name,
+                _df_fingerprint(report_df),
+                _selections_key(selections),
+                _logo_path,
+                report_df, selections, calcs, charts, vol_breakdown,
             )
 
             # ── Save report record to DB ───────────────────────────────────
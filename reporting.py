@@ -3,6 +3,9 @@ from __future__ import annotations
 import html
 import io
 import base64
+import functools
+import hashlib
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
@@ -24,6 +27,38 @@ _METRIC_FORMATS: Dict[str, str] = {
     "volume_m3":      "{:,.3f} m³",
 }
 
+# Upper bound on plotted points per chart; longer series are mean-resampled.
+_CHART_MAX_POINTS = 2000
+
+# Resolve trapezoidal integration function — np.trapz removed in NumPy 2.0.
+_trapz = getattr(np, "trapezoid", None) or getattr(np, "trapz", None)
+
+# Rendered chart PNGs keyed by a digest of the figure spec (LRU, bounded).
+_PNG_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_PNG_CACHE_MAX = 128
+
+
+# Fixed stylesheet for the HTML/PDF report; kept out of the per-call f-string.
+_REPORT_STYLE = """\
+<style>
+  body { font-family: -apple-system, Segoe UI, Roboto, Inter, sans-serif; color: #4A4A4A; margin: 40px; background: #F4F5F4; }
+  h1, h2, h3 { font-weight: 600; color: #4A4A4A; }
+  h1 { margin-top: 0; color: #3A7F5F; }
+  h2 { color: #2F6B50; }
+  h3 { color: #3A7F5F; font-size: 1em; margin-top: 12px; }
+  .header { display: flex; align-items: center; justify-content: space-between; margin-bottom: 30px; border-bottom: 3px solid #3A7F5F; padding-bottom: 20px; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 6px rgba(58,127,95,0.08); }
+  .header-left { display: flex; align-items: center; gap: 20px; }
+  .section { margin: 24px 0; }
+  .card { border: 1px solid #D9D9D9; border-radius: 8px; padding: 16px; margin-bottom: 16px; background: #ffffff; box-shadow: 0 1px 4px rgba(58,127,95,0.05); }
+  table { border-collapse: collapse; width: 100%; margin: 12px 0; }
+  th, td { border: 1px solid #D9D9D9; padding: 10px; text-align: right; }
+  th { background: #E8F3EE; text-align: left; font-weight: 600; color: #2F6B50; }
+  td:first-child { text-align: left; }
+  .small { color: #6b7280; font-size: 12px; margin-top: 8px; }
+  .footer { margin-top: 40px; padding-top: 12px; border-top: 1px solid #D9D9D9; font-size: 11px; color: #9ca3af; text-align: center; }
+</style>
+"""
+
 
 def _strip_html(text: str) -> str:
     """Return plain text with all HTML tags removed (safe for PDF output)."""
@@ -62,7 +97,14 @@ try:
 except Exception:
     _MATPLOTLIB_AVAILABLE = False
 
-# For PDF generation
+# For PDF generation — headless Chromium (already installed for the scraper)
+# prints the HTML report directly; WeasyPrint is kept as a secondary engine.
+try:
+    from playwright.sync_api import sync_playwright
+    _PLAYWRIGHT_AVAILABLE = True
+except Exception:
+    _PLAYWRIGHT_AVAILABLE = False
+
 try:
     from weasyprint import HTML, CSS
     _WEASYPRINT_AVAILABLE = True
@@ -105,57 +147,77 @@ class ReportSelections:
     custom_title: str = ""
 
 
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of ``df`` with a UTC ``timestamp`` column, sorted ascending.
+
+    Call once per report and pass the result to both
+    :func:`compute_calculations` and :func:`create_charts`.
+    """
+    if df.empty:
+        return df
+    dfx = df.copy()
+    dfx["timestamp"] = pd.to_datetime(dfx["timestamp"], utc=True)  # normalise to UTC
+    return dfx.sort_values("timestamp")
+
+
 def compute_calculations(df: pd.DataFrame, selections: ReportSelections) -> Dict[str, Dict[str, float]]:
     """Compute selected calculations per variable.
     Supported calculations:
     - mean, max, min, std, median (p50), p95
-    - volume (for flow_lps only): integrate L/s over time to liters and m^3
+    - volume (for flow_lps only): trapezoidal integral of L/s over time, in liters
+      and m^3; reverse (negative) flow reduces the total rather than being clipped
     - count, range
+
+    ``df`` must already be prepared with :func:`prepare_frame`.
     """
     results: Dict[str, Dict[str, float]] = {}
     if df.empty:
         return results
 
-    # Ensure timestamp is datetime and sorted ascending
-    dfx = df.copy()
-    dfx["timestamp"] = pd.to_datetime(dfx["timestamp"], utc=True)  # normalise to UTC
-    dfx = dfx.sort_values("timestamp")
+    dfx = df
+    calcs = selections.calculations
 
-    for var in selections.variables:
-        if var not in dfx.columns:
-            continue
-        series = pd.to_numeric(dfx[var], errors="coerce")
-        series = series.dropna()
-        if series.empty:
+    # Coerce all selected columns in one pass; stats then run on plain float64 arrays
+    present = [v for v in dict.fromkeys(selections.variables) if v in dfx.columns]
+    num_df = dfx[present].apply(pd.to_numeric, errors="coerce")
+
+    for var in present:
+        col = num_df[var].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(col)
+        arr = col[valid]
+        if arr.size == 0:
             continue
 
         stats: Dict[str, float] = {}
-        if "mean" in selections.calculations:
-            stats["mean"] = float(series.mean())
-        if "max" in selections.calculations:
-            stats["max"] = float(series.max())
-        if "min" in selections.calculations:
-            stats["min"] = float(series.min())
-        if "std" in selections.calculations:
-            stats["std"] = float(series.std(ddof=1))
-        if "p50" in selections.calculations or "median" in selections.calculations:
-            stats["p50"] = float(series.quantile(0.5))
-        if "p95" in selections.calculations:
-            stats["p95"] = float(series.quantile(0.95))
-        if "range" in selections.calculations:
-            stats["range"] = float(series.max() - series.min())
-        if "count" in selections.calculations:
-            stats["count"] = float(series.shape[0])
+        if "mean" in calcs:
+            stats["mean"] = float(arr.mean())
+        if "max" in calcs:
+            stats["max"] = float(arr.max())
+        if "min" in calcs:
+            stats["min"] = float(arr.min())
+        if "std" in calcs:
+            stats["std"] = float(arr.std(ddof=1)) if arr.size > 1 else float("nan")
+        # Both percentiles from a single partition of the array
+        wanted_q = [
+            (q, key) for q, key in ((0.5, "p50"), (0.95, "p95"))
+            if key in calcs or (key == "p50" and "median" in calcs)
+        ]
+        if wanted_q:
+            q_vals = np.quantile(arr, [q for q, _ in wanted_q])
+            for (_, key), val in zip(wanted_q, q_vals):
+                stats[key] = float(val)
+        if "range" in calcs:
+            stats["range"] = float(np.ptp(arr))
+        if "count" in calcs:
+            stats["count"] = float(arr.size)
 
         # Volume calculation only applies to flow_lps
-        if var == "flow_lps" and "volume" in selections.calculations:
-            # Average flow rate (L/s) × elapsed seconds in the period = total volume (L)
-            f = pd.to_numeric(dfx["flow_lps"], errors="coerce").dropna()
-            t = pd.to_datetime(dfx["timestamp"], utc=True)
-            if f.shape[0] > 1:
-                avg_flow_lps = float(f.mean())
-                elapsed_seconds = (t.max() - t.min()).total_seconds()
-                liters = avg_flow_lps * elapsed_seconds
+        if var == "flow_lps" and "volume" in calcs:
+            # Trapezoidal integration of flow rate (L/s) over epoch seconds = total volume (L)
+            if arr.size > 1:
+                t_ns = dfx["timestamp"].values.astype("datetime64[ns]").view("int64")
+                t = t_ns[valid].astype(np.float64) * 1e-9
+                liters = float(_trapz(arr, t))
                 m3 = liters / 1000.0
                 stats["volume_liters"] = liters
                 stats["volume_m3"] = m3
@@ -199,9 +261,6 @@ def compute_volume_breakdown(
     dfx["_local_date"] = local_ts.dt.date
     dfx["_local_hour"] = local_ts.dt.hour
 
-    # Resolve trapezoidal integration function — np.trapz removed in NumPy 2.0.
-    _trapz = getattr(np, "trapezoid", None) or getattr(np, "trapz", None)
-
     def _integrate(sub: pd.DataFrame) -> Optional[Dict]:
         flow_vals = sub["_flow"].values
         # Convert tz-aware UTC timestamps to epoch seconds in a way that is
@@ -357,7 +416,7 @@ def _quality_narrative(ar: "AnomalyReport", total_rows: int, period_hours: float
 
     opening = (
         f"The automated quality analysis reviewed {total_rows:,} measurements spanning "
-        f"{hours_str}. Overall data quality is assessed as <strong>{qual}</strong> "
+        f"{hours_str}. Overall data quality is assessed as <strong>{html.escape(qual)}</strong> "
         f"(confidence score {ar.confidence_score:.0f}/100). "
     )
 
@@ -398,14 +457,33 @@ def _quality_narrative(ar: "AnomalyReport", total_rows: int, period_hours: float
     return opening + closing + advice
 
 
+def _downsample(dfx: pd.DataFrame, var: str, max_points: int = _CHART_MAX_POINTS) -> pd.Series:
+    """Return ``var`` as a numeric series indexed by timestamp, capped at ~max_points.
+
+    Long windows are mean-resampled into equal time buckets so the figure JSON
+    (and the kaleido/matplotlib render) stays bounded regardless of how many
+    raw samples fall inside the report period.
+    """
+    series = pd.Series(
+        pd.to_numeric(dfx[var], errors="coerce").values,
+        index=pd.DatetimeIndex(dfx["timestamp"]),
+    ).dropna()
+    if len(series) <= max_points:
+        return series
+    span = series.index.max() - series.index.min()
+    bucket = max(pd.Timedelta(seconds=1), (span / max_points).ceil("s"))
+    return series.resample(bucket).mean().dropna()
+
+
 def create_charts(df: pd.DataFrame, selections: ReportSelections) -> Dict[str, go.Figure]:
-    """Create time-series charts for selected variables with brand styling."""
+    """Create time-series charts for selected variables with brand styling.
+
+    ``df`` must already be prepared with :func:`prepare_frame`.
+    """
     charts: Dict[str, go.Figure] = {}
     if df.empty:
         return charts
-    dfx = df.copy()
-    dfx["timestamp"] = pd.to_datetime(dfx["timestamp"], utc=True)
-    dfx = dfx.sort_values("timestamp")
+    dfx = df
 
     _COLOURS = {
         "depth_mm":     "#3A7F5F",
@@ -427,10 +505,11 @@ def create_charts(df: pd.DataFrame, selections: ReportSelections) -> Dict[str, g
         if var not in dfx.columns:
             continue
         colour = _COLOURS.get(var, "#3A7F5F")
+        plot_series = _downsample(dfx, var)
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=dfx["timestamp"],
-            y=pd.to_numeric(dfx[var], errors="coerce"),
+            x=plot_series.index,
+            y=plot_series.values,
             mode="lines",
             line=dict(color=colour, width=1.5),
             name=_TITLES.get(var, var),
@@ -500,11 +579,8 @@ def _fig_to_png_matplotlib(fig: go.Figure) -> Optional[str]:
         return None
 
 
-def fig_to_base64_png(fig: go.Figure) -> Optional[str]:
-    """Render plotly figure to base64 PNG string.
-
-    Tries kaleido first; falls back to matplotlib if kaleido is unavailable or fails.
-    """
+def _render_png(fig: go.Figure) -> Optional[str]:
+    """Render plotly figure to base64 PNG via kaleido, falling back to matplotlib."""
     if _KALEIDO_AVAILABLE:
         try:
             buf = fig.to_image(format="png", scale=2)
@@ -515,6 +591,41 @@ def fig_to_base64_png(fig: go.Figure) -> Optional[str]:
     return _fig_to_png_matplotlib(fig)
 
 
+def fig_to_base64_png(fig: go.Figure) -> Optional[str]:
+    """Render plotly figure to base64 PNG string.
+
+    Tries kaleido first; falls back to matplotlib if kaleido is unavailable or fails.
+    Results are memoised by a digest of the figure JSON, so regenerating an
+    identical report does not re-render its charts.
+    """
+    try:
+        key = hashlib.blake2b(fig.to_json().encode("utf-8"), digest_size=16).digest()
+    except Exception:
+        return _render_png(fig)
+
+    cached = _PNG_CACHE.get(key)
+    if cached is not None:
+        _PNG_CACHE.move_to_end(key)
+        return cached
+
+    b64 = _render_png(fig)
+    if b64:
+        _PNG_CACHE[key] = b64
+        if len(_PNG_CACHE) > _PNG_CACHE_MAX:
+            _PNG_CACHE.popitem(last=False)
+    return b64
+
+
+@functools.lru_cache(maxsize=8)
+def _logo_data_uri(path: str, mtime_ns: int) -> str:
+    """Read and base64-encode a logo file once; ``mtime_ns`` invalidates on change."""
+    with open(path, "rb") as f:
+        logo_b64 = base64.b64encode(f.read()).decode()
+    suffix = Path(path).suffix.lower()
+    mime = "image/svg+xml" if suffix == ".svg" else "image/png"
+    return f"data:{mime};base64,{logo_b64}"
+
+
 def build_html_report(device_name: str,
                       df: pd.DataFrame,
                       selections: ReportSelections,
@@ -549,11 +660,8 @@ def build_html_report(device_name: str,
     logo_html = ""
     if logo_path and Path(logo_path).exists():
         try:
-            with open(logo_path, "rb") as f:
-                logo_b64 = base64.b64encode(f.read()).decode()
-            suffix = Path(logo_path).suffix.lower()
-            mime = "image/svg+xml" if suffix == ".svg" else "image/png"
-            logo_html = f"<img src='data:{mime};base64,{logo_b64}' style='height:60px;margin-bottom:20px;'/>"
+            logo_uri = _logo_data_uri(str(logo_path), Path(logo_path).stat().st_mtime_ns)
+            logo_html = f"<img src='{logo_uri}' style='height:60px;margin-bottom:20px;'/>"
         except Exception:
             pass
 
@@ -565,7 +673,6 @@ def build_html_report(device_name: str,
         narrative = _quality_narrative(ar, total_rows=len(df), period_hours=period_hours)
 
         # Only list anomaly types that actually occurred
-        type_rows = ""
         type_map = [
             ("Sensor Flatline Events", ar.flatline_count),
             ("Rapid Rate-of-Change Alerts", ar.spike_count),
@@ -574,9 +681,10 @@ def build_html_report(device_name: str,
             ("Hydraulic Inconsistencies", ar.velocity_depth_count),
             ("Statistical Outliers", ar.zscore_count),
         ]
-        for label, count in type_map:
-            if count:
-                type_rows += f"<tr><td>{label}</td><td>{count}</td></tr>"
+        type_rows = "".join(
+            f"<tr><td>{label}</td><td>{count}</td></tr>"
+            for label, count in type_map if count
+        )
 
         type_table = (
             f"<table><thead><tr><th>Event Type</th><th>Count</th></tr></thead>"
@@ -590,7 +698,7 @@ def build_html_report(device_name: str,
           <div style='display:flex;gap:24px;margin-bottom:10px;'>
             <div>
               <span style='font-size:11px;color:#6b7280;text-transform:uppercase;font-weight:600;'>Quality Rating</span><br/>
-              <span style='color:{qual_color};font-weight:700;font-size:1.2em;'>{ar.quality_label}</span>
+              <span style='color:{qual_color};font-weight:700;font-size:1.2em;'>{html.escape(ar.quality_label)}</span>
             </div>
             <div>
               <span style='font-size:11px;color:#6b7280;text-transform:uppercase;font-weight:600;'>Confidence Score</span><br/>
@@ -620,7 +728,7 @@ def build_html_report(device_name: str,
             "hourly": "Hourly",
         }
         interval_label = interval_labels.get(selections.volume_breakdown_interval, "")
-        vol_rows_html = ""
+        vol_rows: List[str] = []
         for row in volume_breakdown:
             if row.get("is_grand_total"):
                 style = "font-weight:700; background:#E8F3EE;"
@@ -628,7 +736,7 @@ def build_html_report(device_name: str,
                 style = "font-weight:600; background:#F4F5F4;"
             else:
                 style = ""
-            vol_rows_html += (
+            vol_rows.append(
                 f"<tr style='{style}'>"
                 f"<td style='text-align:left'>{html.escape(row['period_label'])}</td>"
                 f"<td>{row['volume_m3']:,.1f}</td>"
@@ -638,6 +746,7 @@ def build_html_report(device_name: str,
                 f"<td>{row['reading_count']:,}</td>"
                 f"</tr>"
             )
+        vol_rows_html = "".join(vol_rows)
         vol_html = f"""
         <div class='section card'>
           <h2>Flow Volume Breakdown — {interval_label}</h2>
@@ -674,61 +783,47 @@ def build_html_report(device_name: str,
 
     metrics_html = ""
     if selections.include_stats_table and calculations:
-        metrics_html = "<div class='section card'><h2>Summary Statistics</h2>"
+        metric_parts: List[str] = ["<div class='section card'><h2>Summary Statistics</h2>"]
         for var, stats in calculations.items():
             if not stats:
                 continue
-            metrics_html += f"<h3>{_VAR_LABELS.get(var, var)}</h3>"
-            metrics_html += "<table><thead><tr><th>Metric</th><th>Value</th></tr></thead><tbody>"
-            for k, v in stats.items():
-                fmt = _METRIC_FORMATS.get(k, "{:.3f}")
-                formatted = fmt.format(v)
-                metrics_html += f"<tr><td>{_METRIC_LABELS.get(k, k)}</td><td>{formatted}</td></tr>"
-            metrics_html += "</tbody></table>"
-        metrics_html += "</div>"
+            metric_parts.append(f"<h3>{html.escape(_VAR_LABELS.get(var, var))}</h3>")
+            metric_parts.append("<table><thead><tr><th>Metric</th><th>Value</th></tr></thead><tbody>")
+            metric_parts.extend(
+                f"<tr><td>{html.escape(_METRIC_LABELS.get(k, k))}</td><td>{_METRIC_FORMATS.get(k, '{:.3f}').format(v)}</td></tr>"
+                for k, v in stats.items()
+            )
+            metric_parts.append("</tbody></table>")
+        metric_parts.append("</div>")
+        metrics_html = "".join(metric_parts)
 
     # ── Charts section ───────────────────────────────────────────────────────
     charts_html = ""
     if selections.include_charts and charts:
-        charts_html = "<div class='section card'><h2>Time-Series Charts</h2>"
+        chart_parts: List[str] = ["<div class='section card'><h2>Time-Series Charts</h2>"]
         for var, fig in charts.items():
             b64 = fig_to_base64_png(fig)
             if b64:
-                charts_html += (
-                    f"<h3>{_VAR_LABELS.get(var, var)}</h3>"
+                chart_parts.append(
+                    f"<h3>{html.escape(_VAR_LABELS.get(var, var))}</h3>"
                     f"<img src='data:image/png;base64,{b64}' "
                     f"style='max-width:100%;height:auto;border:1px solid #eee;border-radius:6px;'/>"
                 )
             else:
-                charts_html += (
-                    f"<h3>{_VAR_LABELS.get(var, var)}</h3>"
+                chart_parts.append(
+                    f"<h3>{html.escape(_VAR_LABELS.get(var, var))}</h3>"
                     f"<p style='color:#9ca3af;font-size:12px;'>Chart unavailable — "
                     f"install kaleido or matplotlib to enable chart images.</p>"
                 )
-        charts_html += "</div>"
+        chart_parts.append("</div>")
+        charts_html = "".join(chart_parts)
 
     intro = f"""
     <html>
       <head>
         <meta charset='utf-8'/>
         <title>{html.escape(display_title)} — {html.escape(device_name)}</title>
-        <style>
-          body {{ font-family: -apple-system, Segoe UI, Roboto, Inter, sans-serif; color: #4A4A4A; margin: 40px; background: #F4F5F4; }}
-          h1, h2, h3 {{ font-weight: 600; color: #4A4A4A; }}
-          h1 {{ margin-top: 0; color: #3A7F5F; }}
-          h2 {{ color: #2F6B50; }}
-          h3 {{ color: #3A7F5F; font-size: 1em; margin-top: 12px; }}
-          .header {{ display: flex; align-items: center; justify-content: space-between; margin-bottom: 30px; border-bottom: 3px solid #3A7F5F; padding-bottom: 20px; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 6px rgba(58,127,95,0.08); }}
-          .header-left {{ display: flex; align-items: center; gap: 20px; }}
-          .section {{ margin: 24px 0; }}
-          .card {{ border: 1px solid #D9D9D9; border-radius: 8px; padding: 16px; margin-bottom: 16px; background: #ffffff; box-shadow: 0 1px 4px rgba(58,127,95,0.05); }}
-          table {{ border-collapse: collapse; width: 100%; margin: 12px 0; }}
-          th, td {{ border: 1px solid #D9D9D9; padding: 10px; text-align: right; }}
-          th {{ background: #E8F3EE; text-align: left; font-weight: 600; color: #2F6B50; }}
-          td:first-child {{ text-align: left; }}
-          .small {{ color: #6b7280; font-size: 12px; margin-top: 8px; }}
-          .footer {{ margin-top: 40px; padding-top: 12px; border-top: 1px solid #D9D9D9; font-size: 11px; color: #9ca3af; text-align: center; }}
-        </style>
+        {_REPORT_STYLE}
       </head>
       <body>
         <div class='header'>
@@ -1020,6 +1115,23 @@ def _build_pdf_reportlab(device_name: str,
     return buf.getvalue()
 
 
+def _html_to_pdf_chromium(html_content: str) -> bytes:
+    """Print an HTML document to A4 PDF bytes using headless Chromium.
+
+    The sync Playwright API binds its browser to the calling thread, and
+    Streamlit runs each script rerun on its own thread, so the browser is
+    launched per call rather than shared.
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
+        try:
+            page = browser.new_page()
+            page.set_content(html_content, wait_until="load")
+            return page.pdf(format="A4", print_background=True)
+        finally:
+            browser.close()
+
+
 def build_pdf_report(device_name: str,
                      df: pd.DataFrame,
                      selections: ReportSelections,
@@ -1029,17 +1141,33 @@ def build_pdf_report(device_name: str,
                      volume_breakdown: Optional[List[Dict]] = None) -> bytes:
     """Generate a PDF report.
 
-    Tries WeasyPrint first (richer HTML-CSS rendering); falls back to a
-    pure-Python reportlab implementation that requires no system libraries.
-    Returns empty bytes only if both engines are unavailable.
+    Prints the HTML report with headless Chromium first (fast, full CSS
+    support); then tries WeasyPrint; finally falls back to a pure-Python
+    reportlab implementation that requires no system libraries.
+    Returns empty bytes only if every engine is unavailable.
     """
-    # ── WeasyPrint path ──────────────────────────────────────────────────────
-    if _WEASYPRINT_AVAILABLE:
+    html_content: Optional[str] = None
+    if _PLAYWRIGHT_AVAILABLE or _WEASYPRINT_AVAILABLE:
         try:
             html_content = build_html_report(
                 device_name, df, selections, calculations, charts, logo_path,
                 volume_breakdown=volume_breakdown,
             )
+        except Exception as e:
+            print(f"HTML report generation failed, falling back to reportlab: {e}")
+
+    # ── Chromium path ────────────────────────────────────────────────────────
+    if _PLAYWRIGHT_AVAILABLE and html_content:
+        try:
+            pdf_bytes = _html_to_pdf_chromium(html_content)
+            if pdf_bytes:
+                return pdf_bytes
+        except Exception as e:
+            print(f"Chromium PDF generation failed, trying WeasyPrint: {e}")
+
+    # ── WeasyPrint path ──────────────────────────────────────────────────────
+    if _WEASYPRINT_AVAILABLE and html_content:
+        try:
             pdf_bytes = HTML(string=html_content).write_pdf()
             if pdf_bytes:
                 return pdf_bytes
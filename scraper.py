@@ -1,48 +1,84 @@
 """
 Data Scraper Module - Autonomous Web Automation & DOM Extraction
 
-This module implements browser automation using Playwright to extract
-hydrological measurements from JavaScript-rendered USRIOT dashboards.
+This module fetches hydrological measurements from USRIOT dashboards, using
+the dashboard's JSON API where possible and Playwright for the rendered page.
 
 Key Features:
-    - Headless Chromium orchestration with intelligent page-load detection
-  - CSS selector-based DOM traversal with JavaScript execution
-  - Regex-based numeric value extraction with unit parsing
+  - Direct USRIOT API access via the share-link token (no browser needed)
+  - Hedged fallback to a shared headless Chromium when the API is slow or empty
+  - Single-pass numeric value extraction with unit stripping
   - Change-detection to minimize database writes
   - Comprehensive error handling and resilience
   - Timezone-aware timestamp management
 
 Architecture:
-    1. Browser initialization with headless Chromium via Playwright
-    2. Page load waiting for network idle
-    3. DOM querying with CSS selector queries
-    4. Regex parsing of measurement strings (e.g., "133mm" -> 133.0)
-    5. Change detection via FlowDatabase.has_changed()
-    6. Async persistence with pytz timezone handling
+    1. API fetch in a worker thread over a pooled requests.Session
+    2. After API_HEDGE_DELAY (or an empty API result), a Playwright render in
+       a fresh context of the shared browser, with images/fonts/media and
+       analytics hosts blocked
+    3. Navigation to domcontentloaded, then a wait until every selector
+       shows a digit (_VALUES_READY_JS), and one evaluate() for all values
+    4. Character-scan parsing of measurement strings (e.g., "133mm" -> 133.0)
+    5. Plain-HTTP + CSS selector fallback when the browser fetch fails
+    6. Change detection on readings quantised to sensor resolution, with the
+       last reading per device persisted to .scraper_state.json
 
 Performance Considerations:
   - Page load time: ~1-2 seconds due to USRIOT dashboard rendering
-  - DOM traversal: O(1) with CSS selector + querySelector
-  - Extraction rate: ~5-10 measurements/second
-  - Memory: ~200-300MB per Chrome instance
+  - Concurrent renders bounded by BROWSER_MAX_PAGES
+  - Memory: ~200-300MB for the shared Chrome instance
 """
 
 import asyncio
 import base64
+import functools
 import json
 import os
 import re
 import hashlib
-import zlib
+import math
+import threading
+import time
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from typing import Dict, List, Tuple, Optional
 from urllib.parse import urljoin, urlparse, parse_qs
 from pathlib import Path
 import logging
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-import pytz
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+# selectolax (Lexbor/Modest C parser) is much faster than BeautifulSoup's
+# html.parser for the requests fallback; bs4 is used when it is unavailable.
+try:
+    from selectolax.parser import HTMLParser as _FastHTMLParser
+    _SELECTOLAX_AVAILABLE = True
+except Exception:
+    _SELECTOLAX_AVAILABLE = False
+
+# Tree builder for the BeautifulSoup path: lxml parses in C, html.parser is the last resort
+try:
+    import lxml  # noqa: F401
+    _BS4_FEATURES = "lxml"
+except Exception:
+    _BS4_FEATURES = "html.parser"
+
+# orjson (de)serialises the API payloads several times faster than the stdlib
+# json module and produces bytes directly; json is used when it is unavailable.
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except Exception:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
 from database import FlowDatabase
 from config import STORE_ALL_READINGS
@@ -54,6 +90,122 @@ logger = logging.getLogger(__name__)
 MONITOR_URL = "https://mp.usriot.com/draw/show.html?lang=en&lightbox=1&highlight=0000ff&layers=1&nav=1&title=FIT100%20Main%20Inflow%20Lismore%20STP&id=97811&link=Lpu7Q2CM3osZ&model=1&cusdeviceNo=0000088831000010&share=48731ec89bf8108b2a451fbffa590da4f0cf419a5623beb7d48c1060e3f0dbe177e28054c26be49bbabca1da5b977e7c16a47891d94f70a08a876d24c55416854700de7cc51a06f8e102798d6ecc39478ef1394a246efa109e6c6358e30a259010a5c403c71756173c90cf1e10ced6fdf54d90881c05559f2c8c5717ee8109210672fa3574a9c04a465bc0df8b9c354da487a7bcb6679a7ec32276ba3610301be80d8c7588ef1797ca01fb6b87e74a8b6e5cd0ac668918d02ae99a7966f57ecf603b63a12d4b0a160d3ac0920254d6836f1e26d244412f82859f7f7b0df7b8406e95ef97a7cb2302a07826d3b8cba81721c5bce1d7e9bf0b01f32d1d0330a44301a1ab0f"
 
 DEFAULT_TZ = "Australia/Brisbane"
+_TZ = ZoneInfo(DEFAULT_TZ)
+
+_API_BASE = "https://api.mp.usriot.com"
+
+# Cache-busting headers for fresh data on every request
+_NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+# How long a refreshed share token and a device's dataPointRelId map are reused (seconds)
+TOKEN_CACHE_TTL = 10 * 60
+RELMAP_CACHE_TTL = 60 * 60
+
+# Chromium flags that skip work the scraper never needs (images, GPU,
+# extensions, background services), cutting render time and memory
+_CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=TranslateUI,BackForwardCache",
+]
+
+# Sub-resources aborted during dashboard loads; values are read from the DOM text only
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+# Third-party analytics/tracking hosts the dashboard pulls in; never needed for scraping
+_BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "hm.baidu.com", "cnzz.com")
+
+# Page-side check that every selector has rendered a number; used to wait
+# for the dashboard's values instead of waiting for network idle
+_VALUES_READY_JS = """(sels) => sels.every((s) => {
+    const el = document.querySelector(s);
+    return !!el && /\\d/.test(el.textContent || "");
+})"""
+
+# Reads every selector's text in one round-trip: {key: textContent or null}
+_READ_SELECTORS_JS = """(sels) => Object.fromEntries(Object.entries(sels).map(([k, s]) => {
+    const el = document.querySelector(s);
+    return [k, el ? el.textContent : null];
+}))"""
+
+# Maximum dashboard pages rendered at once in the shared browser
+BROWSER_MAX_PAGES = 4
+
+# Seconds to wait for the API before also starting the browser (hedged request)
+API_HEDGE_DELAY = 2.0
+
+# Maximum dashboard body read by the plain-HTTP fallback (bytes)
+REQUESTS_FALLBACK_MAX_BYTES = 512 * 1024
+
+# Reading fields compared by change detection, in a fixed order, and the
+# scale each is quantised by before comparing (i.e. its sensor resolution):
+# depth 1 mm, velocity 0.01 m/s, flow 0.1 L/s. Smaller fluctuations are
+# treated as noise and do not trigger a database write.
+_READING_KEYS = ("depth_mm", "velocity_mps", "flow_lps")
+_READING_QUANT = (1.0, 100.0, 10.0)
+
+
+def _reading_key(data: Dict) -> Tuple:
+    """Fixed-order tuple of a reading's quantised values, used for change detection.
+
+    Missing and non-finite (NaN/inf) values quantise to None.
+    """
+    return tuple(
+        None if v is None or not math.isfinite(v) else int(round(v * q))
+        for v, q in zip((data.get(k) for k in _READING_KEYS), _READING_QUANT)
+    )
+
+
+def _first_number(text: str) -> Optional[float]:
+    """Return the first number in a dashboard value string, or None.
+
+    Matches ``-?\\d+(?:\\.\\d+)?`` ("133mm" -> 133.0, "-0.42 m/s" -> -0.42),
+    except that a minus attached to a preceding letter or digit is read as a
+    hyphen, not a sign ("Depth-133" -> 133.0). A single character scan is
+    cheaper than the regex engine for these short strings.
+    """
+    n = len(text)
+    for i in range(n):
+        if "0" <= text[i] <= "9":
+            signed = i > 0 and text[i - 1] == "-" and (i == 1 or not text[i - 2].isalnum())
+            start = i - 1 if signed else i
+            j = i + 1
+            while j < n and "0" <= text[j] <= "9":
+                j += 1
+            if j + 1 < n and text[j] == "." and "0" <= text[j + 1] <= "9":
+                j += 2
+                while j < n and "0" <= text[j] <= "9":
+                    j += 1
+            return float(text[start:j])
+    return None
+
+
+@functools.lru_cache(maxsize=16)
+def _parse_monitor_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (share, cusdeviceNo) from a dashboard URL; memoised as monitor URLs are fixed."""
+    qs = parse_qs(urlparse(url).query)
+    return (qs.get("share") or [None])[0], (qs.get("cusdeviceNo") or [None])[0]
+
+
+async def _route_blocking_assets(route):
+    """Playwright route handler that aborts image/font/media and analytics requests."""
+    request = route.request
+    if request.resource_type in _BLOCKED_RESOURCE_TYPES or any(h in request.url for h in _BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
 
 
 class DataScraper:
@@ -72,7 +224,8 @@ class DataScraper:
       - Resource Management: Context manager pattern for browser cleanup
       - Caching: last_data dict for O(1) change detection
     
-    Thread Safety: Not thread-safe; designed for single-threaded async/await usage.
+    Thread Safety: designed for one event loop; store_measurement may also run in
+    worker threads (change-detection state is guarded by a lock).
     
     Example:
         scraper = DataScraper()
@@ -85,21 +238,117 @@ class DataScraper:
     def __init__(self, db: FlowDatabase = None):
         """Initialize scraper with optional database instance."""
         self.db = db or FlowDatabase()
-        self.tz = pytz.timezone(DEFAULT_TZ)
+        self.tz = _TZ
         
         # File-based persistence for change detection state
         self.state_file = Path(__file__).parent / ".scraper_state.json"
         self.last_data = self._load_state()
+        # Storage mode is fixed for the process; resolve it once rather than per reading
+        self._check_changes = not STORE_ALL_READINGS
+        # store_measurement may run in worker threads for several devices at once
+        self._state_lock = threading.RLock()
         
         # Allow forcing requests-only mode via environment to avoid browser launches in constrained runtimes
         self.force_requests = os.getenv("SCRAPER_FORCE_REQUESTS", "").lower() in ("1", "true", "yes")
-    
+
+        # Long-lived Playwright browser, launched lazily and shared by every fetch.
+        # Playwright objects are bound to the event loop that created them.
+        self._pw = None
+        self._browser = None
+        self._browser_loop = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._page_slots: Optional[asyncio.Semaphore] = None
+
+        # API token / data-point map caches keyed by (share_param, cusdeviceNo): (value, expires_at)
+        self._token_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._relmap_cache: Dict[Tuple[str, str], Tuple[Dict[int, int], float]] = {}
+
+        # One keep-alive session for every API call and the plain-HTTP fallback. The API POSTs
+        # are read-only queries, so they are safe to retry on gateway errors.
+        self._session = requests.Session()
+        self._session.headers.update(_NO_CACHE_HEADERS)
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                        allowed_methods=frozenset({"GET", "POST"}))
+        self._session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries))
+
+    async def _ensure_browser(self):
+        """Return the shared Chromium instance, launching it on first use.
+
+        Relaunches if the previous browser disconnected or was created on a
+        different event loop. Callers that drive the scraper with their own
+        short-lived loops (e.g. one ``asyncio.run`` per fetch) must await
+        :meth:`aclose` before the loop ends, or the old browser can outlive it.
+        """
+        loop = asyncio.get_running_loop()
+        if self._browser_loop is not loop:
+            self._release_stale_browser()
+            self._browser_loop = loop
+            self._browser_lock = asyncio.Lock()
+            self._page_slots = asyncio.Semaphore(BROWSER_MAX_PAGES)
+
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                logger.info("Launching shared Chromium instance")
+                self._browser = await self._pw.chromium.launch(headless=True, args=_CHROMIUM_ARGS)
+        return self._browser
+
+    def _release_stale_browser(self):
+        """Shut down a browser left behind by another event loop.
+
+        Its handles can only be awaited on the loop that created them, so the
+        close is handed to that loop if it is still running. A closed loop can
+        no longer stop it; that case is logged, since it means aclose() was
+        skipped.
+        """
+        browser, pw, old_loop = self._browser, self._pw, self._browser_loop
+        self._browser = None
+        self._pw = None
+        if browser is None and pw is None:
+            return
+        if old_loop is not None and old_loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_handles(browser, pw), old_loop)
+        else:
+            logger.warning("Playwright browser from a finished event loop was not closed; "
+                           "await DataScraper.aclose() before the loop ends")
+
+    async def aclose(self):
+        """Shut down the shared browser and Playwright driver, if running."""
+        browser, pw = self._browser, self._pw
+        self._browser = None
+        self._pw = None
+        await self._close_handles(browser, pw)
+
+    @staticmethod
+    async def _close_handles(browser, pw):
+        """Close a browser and stop its Playwright driver, ignoring errors."""
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.debug(f"Error closing browser: {e}")
+        if pw is not None:
+            try:
+                await pw.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping Playwright: {e}")
+
+    async def __aenter__(self):
+        # The browser is still launched lazily; this only scopes its shutdown
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
     def _load_state(self) -> Dict:
         """Load change detection state from disk."""
         try:
             if self.state_file.exists():
                 with open(self.state_file, 'r') as f:
                     state = json.load(f)
+                    for data in state.values():
+                        data['_key'] = _reading_key(data)
                     logger.debug(f"Loaded change detection state from disk: {len(state)} devices")
                     return state
         except Exception as e:
@@ -115,11 +364,15 @@ class DataScraper:
                 serializable_state[device_id] = {
                     k: v.isoformat() if isinstance(v, datetime) else v
                     for k, v in data.items()
+                    if k != '_key'
                 }
             
-            with open(self.state_file, 'w') as f:
-                json.dump(serializable_state, f, indent=2)
-            logger.debug(f"Saved change detection state to disk")
+            # Write-then-rename so a crash mid-write never leaves a truncated state file
+            tmp_file = self.state_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(serializable_state, f, separators=(',', ':'))
+            os.replace(tmp_file, self.state_file)
+            logger.debug("Saved change detection state to disk")
         except Exception as e:
             logger.warning(f"Failed to save state file: {e}")
 
@@ -142,302 +395,415 @@ class DataScraper:
                 prand = str(int(prand[:10]) + int(prand[10:]))
             prand = (mult * int(prand) + incr) % modu
 
-            enc_str = []
-            for i in range(0, len(share_core), 2):
-                enc_chr = int(share_core[i:i + 2], 16) ^ int((prand / modu) * 255)
-                enc_str.append(chr(enc_chr))
+            cipher = np.frombuffer(bytes.fromhex(share_core), dtype=np.uint8)
+            # The LCG is inherently serial; only the keystream generation stays in Python
+            stream = np.empty(cipher.size, dtype=np.float64)
+            for i in range(cipher.size):
+                stream[i] = prand
                 prand = (mult * prand + incr) % modu
+            key = (stream / modu * 255).astype(np.uint8)
 
-            decoded = base64.b64decode("".join(enc_str)).decode("utf-8")
-            payload = json.loads(decoded)
+            payload = _json_loads(base64.b64decode((cipher ^ key).tobytes()))
             return payload.get("token")
         except Exception:
             logger.debug("Failed to decrypt share token", exc_info=True)
             return None
 
+    def _refresh_token(self, token: str) -> str:
+        """Exchange a (possibly expired) share token for a fresh one; returns the input on failure."""
+        refresh_url = f"{_API_BASE}/usrCloud/user/refreshShareToken?token={token}&t={time.time_ns() // 1_000_000}"
+        try:
+            refresh_resp = self._session.get(refresh_url, timeout=10)
+            if refresh_resp.status_code == 200:
+                refreshed = _json_loads(refresh_resp.content)
+                if refreshed.get("status") == 0:
+                    return refreshed.get("data", token)
+        except Exception:
+            logger.debug("Token refresh failed", exc_info=True)
+        return token
+
+    def _get_api_token(self, cache_key: Tuple[str, str], share_param: str) -> Optional[str]:
+        """Return a usable API token, decrypting and refreshing only when the cached one has expired."""
+        cached = self._token_cache.get(cache_key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        token = self._decrypt_share_token(share_param)
+        if not token:
+            return None
+        # The decrypted token is often already expired in embeds, so always refresh it
+        token = self._refresh_token(token)
+        self._token_cache[cache_key] = (token, time.monotonic() + TOKEN_CACHE_TTL)
+        return token
+
+    def _invalidate_api_cache(self, cache_key: Tuple[str, str]):
+        """Drop the cached token and data-point map for a device (e.g. after a 4010)."""
+        self._token_cache.pop(cache_key, None)
+        self._relmap_cache.pop(cache_key, None)
+
+    def _get_rel_map(self, cache_key: Tuple[str, str], cusdevice_no: str, headers: Dict) -> Optional[Dict[int, int]]:
+        """Map itemId -> dataPointRelId for a device. Returns None if the token has expired."""
+        cached = self._relmap_cache.get(cache_key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        # Fetch data point IDs (velocity=itemId 1, depth=itemId 2, flow=itemId 15)
+        datapoint_url = f"{_API_BASE}/usrCloud/cusdevice/getBatchDataPointInfo"
+        query_list = [
+            {"cusdeviceNo": cusdevice_no, "slaveIndex": "1", "itemId": str(item_id)}
+            for item_id in (1, 2, 15)
+        ]
+        body = _json_dumps({"dataPointQueryList": query_list, "token": headers["token"]})
+        resp = self._session.post(datapoint_url, data=body, headers=headers, timeout=10)
+        resp.raise_for_status()
+        payload = _json_loads(resp.content)
+        if isinstance(payload, dict) and payload.get("status") == 4010:  # token expired
+            return None
+
+        dp_data = payload.get("data", []) if isinstance(payload, dict) else []
+        rel_map = {}
+        for entry in dp_data:
+            try:
+                item = int(entry.get("itemId"))
+                rel_map[item] = entry.get("dataPointRelId")
+            except Exception:
+                continue
+        if rel_map:
+            self._relmap_cache[cache_key] = (rel_map, time.monotonic() + RELMAP_CACHE_TTL)
+        return rel_map
+
+    def _fetch_api_values(self, cache_key: Tuple[str, str], cusdevice_no: str, token: str) -> Optional[Dict]:
+        """Read the latest depth/velocity/flow via the history API. Returns None if the token has expired."""
+        headers = {
+            "token": token,
+            "u-source": "in-draw",
+            "sdk-version": "2.3.2",
+            "languagetype": "0",
+            "traceid": "ODg4MzE=",
+            "content-type": "application/json",
+        }
+
+        rel_map = self._get_rel_map(cache_key, cusdevice_no, headers)
+        if rel_map is None:
+            return None
+
+        # Output key -> dataPointRelId (velocity=itemId 1, depth=itemId 2, flow=itemId 15)
+        wanted = [
+            (key, rel_map.get(item_id))
+            for key, item_id in (("depth_mm", 2), ("velocity_mps", 1), ("flow_lps", 15))
+            if rel_map.get(item_id)
+        ]
+        if not wanted:
+            return {}
+
+        values = self._fetch_latest_points(cusdevice_no, [dp_id for _, dp_id in wanted], headers)
+        if values is None:
+            return None
+        return {key: values[int(dp_id)] for key, dp_id in wanted if int(dp_id) in values}
+
+    def _fetch_latest_points(self, cusdevice_no: str, data_point_ids: List, headers: Dict) -> Optional[Dict[int, float]]:
+        """Latest sample for several data points in one history request.
+
+        Returns {dataPointId: value}, or None if the token has expired.
+        """
+        history_url = "https://sga-history.usriot.com:7002/history/cusdevice/getSampleDataPoint"
+        now_ms = time.time_ns() // 1_000_000
+        # Use a 5-minute window to get only recent data, not stale data from 24h ago
+        start = now_ms - 5 * 60 * 1000  # 5-minute window for fresh data
+        body = {
+            "dataPoints": [
+                {"cusdeviceNo": cusdevice_no, "dataPointId": dp_id, "sampleFun": "LAST"}
+                for dp_id in data_point_ids
+            ],
+            "start": start,
+            "end": now_ms,
+            "token": headers["token"],
+            "timeSort": "desc",
+            "sampleLimit": 1,
+        }
+        r = self._session.post(history_url, data=_json_dumps(body), headers=headers, timeout=10)
+        r.raise_for_status()
+        payload = _json_loads(r.content)
+        if isinstance(payload, dict) and payload.get("status") == 4010:
+            return None
+
+        lst = payload.get("data", {}).get("list", []) if isinstance(payload, dict) else []
+        if not lst:
+            logger.debug("fetch_latest_points(%s): No data in API response", data_point_ids)
+            return {}
+
+        values: Dict[int, float] = {}
+        # Request order is only trustworthy when every requested point came back
+        positional = len(lst) == len(data_point_ids)
+        for pos, entry in enumerate(lst):
+            # Match by dataPointId; fall back to request order if the entry omits it
+            dp_id = entry.get("dataPointId")
+            if dp_id is None:
+                if not positional:
+                    logger.warning(
+                        "fetch_latest_points: Skipping entry %d without dataPointId "
+                        "(%d entries for %d requested points)", pos, len(lst), len(data_point_ids))
+                    continue
+                dp_id = data_point_ids[pos]
+            samples = entry.get("list") or []
+            if not samples or samples[0].get("value") is None:
+                logger.debug("fetch_latest_points: No samples for data point %s", dp_id)
+                continue
+            try:
+                values[int(dp_id)] = float(samples[0]["value"])
+            except (TypeError, ValueError):
+                continue
+        logger.debug("fetch_latest_points(%s): Retrieved %s", data_point_ids, values)
+        return values
+
     def _fetch_via_api(self, url: str) -> Dict:
-        """Call USRIOT APIs directly using the shared link token to avoid browser dependencies."""
+        """Call USRIOT APIs directly using the shared link token to avoid browser dependencies.
+
+        The refreshed token and the data-point ID map are cached per device, so a
+        steady-state poll only issues the history requests. A 4010 (token expired)
+        response invalidates both caches and the fetch is retried once.
+        """
         try:
             logger.info("Attempting API fetch via token-based method...")
-            qs = parse_qs(urlparse(url).query)
-            share_param = (qs.get("share") or [None])[0]
-            cusdevice_no = (qs.get("cusdeviceNo") or [None])[0]
+            share_param, cusdevice_no = _parse_monitor_url(url)
             if not share_param or not cusdevice_no:
                 logger.warning("API fetch: missing share or cusdeviceNo parameter")
                 return {}
 
-            token = self._decrypt_share_token(share_param)
-            if not token:
-                return {}
-
-            # Cache-busting headers for fresh data on every request
-            cache_headers = {
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-
-            # Refresh the token (the decrypted one is often expired in embeds)
-            refresh_url = f"https://api.mp.usriot.com/usrCloud/user/refreshShareToken?token={token}&t={int(datetime.utcnow().timestamp() * 1000)}"
-            refresh_resp = requests.get(refresh_url, timeout=10, headers=cache_headers)
-            if refresh_resp.status_code == 200:
-                try:
-                    refreshed = refresh_resp.json()
-                    if refreshed.get("status") == 0:
-                        token = refreshed.get("data", token)
-                except Exception:
-                    pass
-
-            # Fetch data point IDs (velocity=itemId 1, depth=itemId 2, flow=itemId 15)
-            datapoint_url = "https://api.mp.usriot.com/usrCloud/cusdevice/getBatchDataPointInfo"
-            query_list = [
-                {"cusdeviceNo": cusdevice_no, "slaveIndex": "1", "itemId": str(item_id)}
-                for item_id in (1, 2, 15)
-            ]
-            headers = {
-                "token": token,
-                "u-source": "in-draw",
-                "sdk-version": "2.3.2",
-                "languagetype": "0",
-                "traceid": "ODg4MzE=",
-                "content-type": "application/json",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-
-            resp = requests.post(datapoint_url, json={"dataPointQueryList": query_list, "token": token}, headers=headers, timeout=10)
-            resp.raise_for_status()
-            payload = resp.json()
-            if payload.get("status") == 4010:  # token expired
-                refresh_url_retry = f"https://api.mp.usriot.com/usrCloud/user/refreshShareToken?token={token}&t={int(datetime.utcnow().timestamp() * 1000)}"
-                refresh_resp = requests.get(refresh_url_retry, timeout=10, headers=cache_headers)
-                if refresh_resp.status_code == 200:
-                    refreshed = refresh_resp.json()
-                    if refreshed.get("status") == 0:
-                        token = refreshed.get("data", token)
-                        headers["token"] = token
-                        resp = requests.post(datapoint_url, json={"dataPointQueryList": query_list, "token": token}, headers=headers, timeout=10)
-                        resp.raise_for_status()
-                        payload = resp.json()
-            dp_data = payload.get("data", []) if isinstance(payload, dict) else []
-            rel_map = {}
-            for entry in dp_data:
-                try:
-                    item = int(entry.get("itemId"))
-                    rel_map[item] = entry.get("dataPointRelId")
-                except Exception:
+            cache_key = (share_param, cusdevice_no)
+            for attempt in range(2):
+                token = self._get_api_token(cache_key, share_param)
+                if not token:
+                    return {}
+                page_data = self._fetch_api_values(cache_key, cusdevice_no, token)
+                if page_data is None:
+                    logger.info("API token expired; refreshing and retrying")
+                    self._invalidate_api_cache(cache_key)
                     continue
+                logger.info("✅ API fetch succeeded: %s", page_data)
+                return page_data
 
-            depth_id = rel_map.get(2)
-            velocity_id = rel_map.get(1)
-            flow_id = rel_map.get(15)
-
-            def fetch_latest_point(data_point_id: int) -> Optional[float]:
-                history_url = "https://sga-history.usriot.com:7002/history/cusdevice/getSampleDataPoint"
-                now_ms = int(datetime.utcnow().timestamp() * 1000)
-                # Use a 5-minute window to get only recent data, not stale data from 24h ago
-                start = now_ms - 5 * 60 * 1000  # 5-minute window for fresh data
-                body = {
-                    "dataPoints": [{"cusdeviceNo": cusdevice_no, "dataPointId": data_point_id, "sampleFun": "LAST"}],
-                    "start": start,
-                    "end": now_ms,
-                    "token": token,
-                    "timeSort": "desc",
-                    "sampleLimit": 1,
-                }
-                r = requests.post(history_url, json=body, headers=headers, timeout=10)
-                r.raise_for_status()
-                payload = r.json()
-                if isinstance(payload, dict) and payload.get("status") == 4010:
-                    # retry once with refreshed token
-                    ref = requests.get(refresh_url, timeout=10)
-                    if ref.status_code == 200:
-                        new_tok = ref.json().get("data")
-                        if new_tok:
-                            body["token"] = new_tok
-                            headers["token"] = new_tok
-                            r = requests.post(history_url, json=body, headers=headers, timeout=10)
-                            r.raise_for_status()
-                            payload = r.json()
-                lst = payload.get("data", {}).get("list", []) if isinstance(payload, dict) else []
-                if not lst:
-                    logger.debug(f"fetch_latest_point({data_point_id}): No data in API response")
-                    return None
-                samples = lst[0].get("list") or []
-                if not samples:
-                    logger.debug(f"fetch_latest_point({data_point_id}): No samples in response list")
-                    return None
-                value = float(samples[0].get("value")) if samples[0].get("value") is not None else None
-                if value is not None:
-                    logger.debug(f"fetch_latest_point({data_point_id}): Retrieved value {value}")
-                return value
-
-            page_data = {}
-            if depth_id:
-                val = fetch_latest_point(depth_id)
-                if val is not None:
-                    page_data["depth_mm"] = val
-            if velocity_id:
-                val = fetch_latest_point(velocity_id)
-                if val is not None:
-                    page_data["velocity_mps"] = val
-            if flow_id:
-                val = fetch_latest_point(flow_id)
-                if val is not None:
-                    page_data["flow_lps"] = val
-
-            logger.info(f"✅ API fetch succeeded: {page_data}")
-            return page_data
+            logger.warning("API fetch: token still rejected after refresh")
+            return {}
         except Exception:
             logger.warning("API fetch failed", exc_info=True)
             return {}
 
     def _has_data_changed(self, device_id: str, new_data: Dict) -> bool:
         """
-        INDUSTRY-STANDARD change detection using CRC32 hashing.
+        Change detection by comparing the reading against the last stored one.
         
         Works reliably for multiple devices with different logging intervals:
         - 1-minute loggers: Detects every change
         - 5-minute loggers: Prevents 4 duplicate entries per 5-minute block
         - 10-minute loggers: Prevents 9 duplicate entries per 10-minute block
         
-        Algorithm:
-        1. Serialize measurement data into canonical JSON form (deterministic)
-        2. Compute CRC32 hash of serialized data
-        3. Compare hash to last stored hash
-        4. Store only if hash differs (prevents any duplicate records)
+        The (depth, velocity, flow) values are packed into a fixed-order tuple
+        and compared to the cached tuple in a single equality check.
         
         Args:
             device_id: Unique device identifier
             new_data: Dict with keys 'depth_mm', 'velocity_mps', 'flow_lps'
             
         Returns:
-            bool: True if data hash differs from last stored (any value changed)
+            bool: True if any value differs from the last stored reading
             
-        Thread Safety: NOT thread-safe - intended for single device per thread
+        Thread Safety: compare-and-update is serialised by self._state_lock
         
         Note: First call always returns True (new device = new data)
         """
-        # Serialize new data in canonical form for deterministic hashing
-        canonical_json = json.dumps(
-            new_data,
-            sort_keys=True,
-            separators=(',', ':'),
-            default=str
-        )
-        
-        # Compute CRC32 hash (32-bit, industry standard for data integrity)
-        new_hash = zlib.crc32(canonical_json.encode('utf-8')) & 0xffffffff
-        
-        # Get last stored hash for this device
-        last_hash = self.last_data.get(device_id, {}).get('_hash')
-        
-        # Check if hash changed (indicates any value changed)
-        has_changed = last_hash is None or new_hash != last_hash
-        
-        if has_changed:
-            # Store new data and hash
+        new_key = _reading_key(new_data)
+        with self._state_lock:
+            last = self.last_data.get(device_id)
+            if last is not None and last.get('_key') == new_key:
+                logger.debug("⊘ No change for %s", device_id)
+                return False
+            self._remember(device_id, new_data, new_key)
+        logger.info("✓ Change detected for %s: D=%smm, V=%sm/s, F=%sL/s", device_id,
+                    new_data.get('depth_mm'), new_data.get('velocity_mps'), new_data.get('flow_lps'))
+        return True
+
+    def _remember(self, device_id: str, new_data: Dict, key: Tuple):
+        """Record a reading as the device's last known values and persist the state."""
+        with self._state_lock:
             self.last_data[device_id] = {
                 **new_data,
-                '_hash': new_hash,
+                '_key': key,
                 '_timestamp': datetime.now(self.tz)
             }
             # Persist state to disk so it survives app restarts
             self._save_state()
-            logger.info(f"✓ Change detected for {device_id}: D={new_data.get('depth_mm')}mm, V={new_data.get('velocity_mps')}m/s, F={new_data.get('flow_lps')}L/s [Hash: {new_hash:08x}]")
-        else:
-            logger.debug(f"⊘ No change for {device_id} (hash match: {new_hash:08x})")
-        
-        return has_changed
 
     def _fetch_via_requests(self, url: str, selectors: Dict) -> Dict:
         """Lightweight fallback that pulls values via plain HTTP and CSS selectors."""
         try:
-            cache_headers = {
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-            resp = requests.get(url, timeout=10, headers=cache_headers)
-            resp.raise_for_status()
+            # Stream the body and stop at a size cap; the values live near the top of the page
+            resp = self._session.get(url, timeout=10, stream=True)
+            try:
+                resp.raise_for_status()
+                chunks: List[bytes] = []
+                total = 0
+                for chunk in resp.iter_content(32 * 1024):
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    if total >= REQUESTS_FALLBACK_MAX_BYTES:
+                        logger.debug("Requests fallback: body truncated at %d bytes", total)
+                        break
+            finally:
+                resp.close()
+            html_bytes = b"".join(chunks)
         except Exception as e:
             logger.warning(f"Requests fallback failed to fetch page: {e}")
             return {}
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        # Both parsers accept bytes and sniff the encoding themselves
+        if _SELECTOLAX_AVAILABLE:
+            tree = _FastHTMLParser(html_bytes)
+
+            def select_text(selector: str) -> Optional[str]:
+                node = tree.css_first(selector)
+                return node.text(strip=True) if node is not None else None
+        else:
+            soup = BeautifulSoup(html_bytes, _BS4_FEATURES)
+
+            def select_text(selector: str) -> Optional[str]:
+                elem = soup.select_one(selector)
+                return elem.get_text(strip=True) if elem else None
+
         extracted = {}
 
         for key, selector in selectors.items():
             try:
-                elem = soup.select_one(selector)
-                if not elem:
-                    logger.debug(f"Requests fallback: selector not found for {key}: {selector}")
+                text = select_text(selector)
+                if text is None:
+                    logger.debug("Requests fallback: selector not found for %s: %s", key, selector)
                     continue
-                text = elem.get_text(strip=True)
-                numbers = re.findall(r"\d+\.?\d*", text)
-                if numbers:
-                    extracted[key] = float(numbers[0])
-                    logger.info(f"Requests fallback extracted {key}: {extracted[key]}")
+                value = _first_number(text)
+                if value is not None:
+                    extracted[key] = value
+                    logger.info("Requests fallback extracted %s: %s", key, value)
                 else:
-                    logger.debug(f"Requests fallback: no numbers in {key} text '{text}'")
+                    logger.debug("Requests fallback: no numbers in %s text '%s'", key, text)
             except Exception as e:
-                logger.debug(f"Requests fallback: error extracting {key}: {e}")
+                logger.debug("Requests fallback: error extracting %s: %s", key, e)
 
         return extracted
 
+    async def _fetch_via_playwright(self, url: str, device_selectors: Dict) -> Optional[Dict]:
+        """Render the dashboard in the shared browser and read the selector values.
+
+        Returns the fetch result, {} if the page loaded but showed no values,
+        or None if the browser fetch itself failed.
+        """
+        try:
+            browser = await self._ensure_browser()
+            # Bound concurrent renders so overlapping device polls cannot exhaust memory
+            await self._page_slots.acquire()
+            # A fresh context per fetch is cheap and isolates cookies/cache
+            context = None
+            # Shielded so a cancellation mid-creation still yields the context for closing
+            context_task = asyncio.ensure_future(
+                browser.new_context(viewport={"width": 1920, "height": 1080}))
+            try:
+                context = await asyncio.shield(context_task)
+                await context.route("**/*", _route_blocking_assets)
+                page = await context.new_page()
+                # The dashboard keeps polling, so network idle pads every load; wait for values instead
+                await page.goto(url, wait_until="domcontentloaded", timeout=20000)
+                try:
+                    await page.wait_for_function(
+                        _VALUES_READY_JS, arg=list(device_selectors.values()), timeout=10000
+                    )
+                except PlaywrightTimeoutError:
+                    logger.debug("Playwright: timed out waiting for values; reading what has rendered")
+                # Only consumed by debug output; skip the extra CDP round-trip otherwise
+                title = await page.title() if logger.isEnabledFor(logging.DEBUG) else None
+
+                texts = await page.evaluate(_READ_SELECTORS_JS, device_selectors)
+
+                page_data = {}
+                for key, text in texts.items():
+                    if text is None:
+                        logger.debug("Playwright: selector not found for %s: %s", key, device_selectors[key])
+                        continue
+                    text = text.strip()
+                    value = _first_number(text)
+                    if value is not None:
+                        page_data[key] = value
+                        logger.info("Playwright extracted %s: %s (from '%s')", key, value, text)
+                    else:
+                        logger.debug("Playwright: no numbers in %s text '%s'", key, text)
+            finally:
+                try:
+                    if context is None:
+                        try:
+                            context = await context_task
+                        except Exception:
+                            context = None
+                    if context is not None:
+                        await context.close()
+                finally:
+                    self._page_slots.release()
+
+            if page_data:
+                logger.info("✅ Playwright fetch succeeded: %s", page_data)
+                return {"data": page_data, "title": title, "timestamp": datetime.now(self.tz)}
+            return {}
+        except Exception as e:
+            logger.warning(f"Playwright fetch failed: {e}, falling back to requests")
+        return None
+
     async def fetch_monitor_data(self, url: str = MONITOR_URL, device_selectors: Optional[Dict] = None) -> Optional[Dict]:
         """Fetch data from the monitor website.
         
         Strategy:
-        1. If selectors available: use Playwright (live page load)
-        2. Otherwise: try API, then requests fallback
+        1. Direct API calls using the share-link token (no browser, fastest)
+        2. If the API is slow (API_HEDGE_DELAY) or yields nothing and selectors are
+           available: Playwright (live page load), racing the API; first data wins
+        3. Finally: plain HTTP + CSS selectors
         """
-        # If we have CSS selectors, use Playwright for live data (most reliable)
-        if device_selectors and not self.force_requests:
-            logger.info("Using Playwright for live page data (selectors available)")
-            try:
-                async with async_playwright() as p:
-                    browser = await p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
-                    page = await browser.new_page(viewport={"width": 1920, "height": 1080})
-                    await page.goto(url, wait_until="networkidle", timeout=20000)
-                    title = await page.title()
-
-                    page_data = {}
-                    for key, selector in device_selectors.items():
-                        try:
-                            el = await page.query_selector(selector)
-                            if not el:
-                                logger.debug(f"Playwright: selector not found for {key}: {selector}")
-                                continue
-                            text = (await el.text_content() or "").strip()
-                            numbers = re.findall(r"\d+\.?\d*", text)
-                            if numbers:
-                                page_data[key] = float(numbers[0])
-                                logger.info(f"Playwright extracted {key}: {page_data[key]} (from '{text}')")
-                            else:
-                                logger.debug(f"Playwright: no numbers in {key} text '{text}'")
-                        except Exception as e:
-                            logger.debug(f"Playwright: error extracting {key}: {e}")
-
-                    await browser.close()
-                    
-                    if page_data:
-                        logger.info(f"✅ Playwright fetch succeeded: {page_data}")
-                        return {"data": page_data, "title": title, "timestamp": datetime.now(self.tz)}
-            except Exception as e:
-                logger.warning(f"Playwright fetch failed: {e}, falling back to API")
+        use_browser = bool(device_selectors) and not self.force_requests
+        # The API path is blocking I/O; run it in a worker thread so the browser can overlap it
+        api_task = asyncio.create_task(asyncio.to_thread(self._fetch_via_api, url))
+        browser_task = None
+        pending = {api_task}
+        if use_browser:
+            done, _ = await asyncio.wait(pending, timeout=API_HEDGE_DELAY)
+            if not done:
+                logger.info("API fetch is slow; starting Playwright alongside it")
+                browser_task = asyncio.create_task(self._fetch_via_playwright(url, device_selectors))
+                pending.add(browser_task)
 
-        # First try direct API calls using the shared token (no browser needed)
-        api_data = self._fetch_via_api(url)
-        if api_data:
-            return {"data": api_data, "title": None, "timestamp": datetime.now(self.tz)}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if api_task in done:
+                    api_data = api_task.result()
+                    if api_data:
+                        return {"data": api_data, "title": None, "timestamp": datetime.now(self.tz)}
+                    if use_browser and browser_task is None:
+                        logger.info("API fetch returned no data; using Playwright for live page data")
+                        browser_task = asyncio.create_task(self._fetch_via_playwright(url, device_selectors))
+                        pending.add(browser_task)
+                if browser_task in done and browser_task.result():
+                    return browser_task.result()
+        finally:
+            # Cancel the losing attempt; awaiting it lets the browser context close cleanly
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # The rendered page showed no values; the static HTML will not have them either
+        if browser_task is not None and browser_task.result() == {}:
+            logger.info("Playwright loaded the dashboard but found no values; skipping requests fallback")
+            return None
 
         # Requests-only mode
         if self.force_requests or device_selectors:
             logger.info("Using requests fallback for data")
             if device_selectors:
-                page_data = self._fetch_via_requests(url, device_selectors)
+                page_data = await asyncio.to_thread(self._fetch_via_requests, url, device_selectors)
                 if page_data:
                     return {"data": page_data, "title": None, "timestamp": datetime.now(self.tz)}
             return None
@@ -446,7 +812,8 @@ class DataScraper:
 
     def store_measurement(self, device_id: str, device_name: str, 
                          depth_mm: float = None, velocity_mps: float = None, 
-                         flow_lps: float = None, allow_storage: bool = False) -> bool:
+                         flow_lps: float = None, allow_storage: bool = False,
+                         timestamp: Optional[datetime] = None) -> bool:
         """
         Store a measurement in the database.
         
@@ -455,6 +822,7 @@ class DataScraper:
         
         If STORE_ALL_READINGS=True, stores every reading.
         If STORE_ALL_READINGS=False, only stores when data has changed.
+        timestamp defaults to now; callers pass the fetch result's timestamp.
         Returns True if stored, False if no change detected (when change detection enabled).
         """
         # SAFETY CHECK: Prevent storage unless explicitly allowed
@@ -469,19 +837,19 @@ class DataScraper:
         }
         
         # Check for changes only if STORE_ALL_READINGS is False
-        if not STORE_ALL_READINGS:
-            # _has_data_changed will also update self.last_data with the computed hash and persist state
+        if self._check_changes:
+            # _has_data_changed will also update self.last_data and persist state
             if not self._has_data_changed(device_id, new_data):
-                logger.debug(f"⊘ No change detected for {device_name}, skipping storage")
+                logger.debug("⊘ No change detected for %s, skipping storage", device_name)
                 return False
             else:
-                logger.info(f"✓ Change detected for {device_name}, storing to database")
+                logger.info("✓ Change detected for %s, storing to database", device_name)
         
         try:
-            self.db.add_device(device_id, device_name)
-            inserted = self.db.add_measurement(
+            inserted = self.db.add_device_measurement(
                 device_id=device_id,
-                timestamp=datetime.now(self.tz),
+                device_name=device_name,
+                timestamp=timestamp or datetime.now(self.tz),
                 depth_mm=depth_mm,
                 velocity_mps=velocity_mps,
                 flow_lps=flow_lps
@@ -492,20 +860,15 @@ class DataScraper:
         
         # Always update change-detection state once we've attempted the write, so that a
         # duplicate-timestamp conflict doesn't cause repeated insert attempts on the next poll.
-        canonical_json = json.dumps(new_data, sort_keys=True, separators=(',', ':'), default=str)
-        new_hash = zlib.crc32(canonical_json.encode('utf-8')) & 0xffffffff
-        self.last_data[device_id] = {
-            **new_data,
-            '_hash': new_hash,
-            '_timestamp': datetime.now(self.tz)
-        }
-        self._save_state()
+        # With change detection on, _has_data_changed has already recorded (and saved) it.
+        if not self._check_changes:
+            self._remember(device_id, new_data, _reading_key(new_data))
 
         if inserted:
-            if STORE_ALL_READINGS:
-                logger.info(f"✅ Stored reading (STORE_ALL mode) for {device_name}: D={depth_mm}mm, V={velocity_mps}mps, F={flow_lps}lps")
+            if self._check_changes:
+                logger.info("✅ Stored CHANGED data for %s: D=%smm, V=%smps, F=%slps", device_name, depth_mm, velocity_mps, flow_lps)
             else:
-                logger.info(f"✅ Stored CHANGED data for {device_name}: D={depth_mm}mm, V={velocity_mps}mps, F={flow_lps}lps")
+                logger.info("✅ Stored reading (STORE_ALL mode) for %s: D=%smm, V=%smps, F=%slps", device_name, depth_mm, velocity_mps, flow_lps)
         else:
             logger.warning(f"⚠️ Measurement for {device_name} was not inserted (duplicate timestamp or constraint violation)")
             return False
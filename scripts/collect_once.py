@@ -28,30 +28,26 @@ def main():
     data = asyncio.run(scraper.fetch_monitor_data(url, selectors))
     print("Fetched:", bool(data), data and data.get("data"))
 
-    if data and data.get("data"):
-        payload = data["data"]
+    payload = (data or {}).get("data") or {}
+    depth_mm = payload.get("depth_mm")
+    velocity_mps = payload.get("velocity_mps")
+    flow_lps = payload.get("flow_lps")
+    if depth_mm is not None or velocity_mps is not None or flow_lps is not None:
         stored = scraper.store_measurement(
             device_id=device_id,
             device_name=device_info.get("name", device_id),
-            depth_mm=payload.get("depth_mm"),
-            velocity_mps=payload.get("velocity_mps"),
-            flow_lps=payload.get("flow_lps"),
+            depth_mm=depth_mm,
+            velocity_mps=velocity_mps,
+            flow_lps=flow_lps,
             allow_storage=True,
+            timestamp=data.get("timestamp"),
         )
         print("Stored:", stored)
     else:
         print("No data to store.")
 
-    from sqlite3 import connect
-    con = connect(db.db_path)
-    cur = con.cursor()
-    cur.execute("select count(*) from measurements")
-    count = cur.fetchone()[0]
-    cur.execute("select device_id, timestamp, depth_mm, velocity_mps, flow_lps from measurements order by timestamp desc limit 1")
-    row = cur.fetchone()
-    con.close()
-    print("Total measurements:", count)
-    print("Latest row:", row)
+    print("Total measurements:", db.get_measurement_count())
+    print("Latest row:", db.get_latest_measurement())
 
 if __name__ == "__main__":
     main()
@@ -20,16 +20,20 @@ def print_step(step_num, text):
     print(f"\n[{step_num}] {text}")
 
 def run_command(cmd, description):
-    """Run a command and handle errors."""
-    print(f"    Running: {cmd}")
+    """Run a command (argv list, no shell) and handle errors."""
+    print(f"    Running: {' '.join(cmd)}")
     try:
-        result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
         print(f"    ✅ {description}")
         return True
     except subprocess.CalledProcessError as e:
         print(f"    ❌ {description} failed")
         print(f"    Error: {e.stderr}")
         return False
+    except OSError as e:
+        print(f"    ❌ {description} failed")
+        print(f"    Error: {e}")
+        return False
 
 def main():
     """Main setup function."""
@@ -50,27 +54,27 @@ def main():
         print("    ✅ Virtual environment already exists")
     else:
         print("    ⚠️  Creating new virtual environment")
-        if not run_command(f"{sys.executable} -m venv .venv", "Virtual environment creation"):
+        if not run_command([sys.executable, "-m", "venv", ".venv"], "Virtual environment creation"):
             return False
     
-    # Activate and install dependencies
+    # Call the venv interpreter directly rather than activating it through a shell
     print_step(3, "Installing Python dependencies")
     if sys.platform == "win32":
-        activate_cmd = ".venv\\Scripts\\activate && "
+        venv_python = str(venv_path / "Scripts" / "python.exe")
     else:
-        activate_cmd = "source .venv/bin/activate && "
+        venv_python = str(venv_path / "bin" / "python")
     
-    if not run_command(f"{activate_cmd}pip install -r requirements.txt", "Dependency installation"):
+    if not run_command([venv_python, "-m", "pip", "install", "-r", "requirements.txt"], "Dependency installation"):
         return False
     
     # Install Playwright browser
     print_step(4, "Installing Playwright browser")
-    if not run_command(f"{activate_cmd}playwright install chromium", "Playwright chromium installation"):
+    if not run_command([venv_python, "-m", "playwright", "install", "chromium"], "Playwright chromium installation"):
         print("    ⚠️  Playwright installation had issues, but continuing...")
     
     # Initialize database
     print_step(5, "Initializing database")
-    if not run_command(f"{activate_cmd}python database.py", "Database initialization"):
+    if not run_command([venv_python, "database.py"], "Database initialization"):
         return False
     
     # Verify database
@@ -34,17 +34,15 @@ def setup_auth():
     existing_devices = flow_db.get_devices()
     existing_ids = {d['device_id'] for d in existing_devices}
     
-    for device_id, device_info in DEVICES.items():
-        if device_id not in existing_ids:
-            flow_db.add_device(
-                device_id,
-                device_info.get("name", device_id),
-                device_info.get("location", "")
-            )
-            print(f"✅ Added device: {device_id} - {device_info.get('name')}")
-        else:
-            print(f"⏭️  Device already exists: {device_id}")
-    
+    missing_ids = DEVICES.keys() - existing_ids
+    new_rows = [
+        (device_id, info.get("name", device_id), info.get("location", ""))
+        for device_id, info in DEVICES.items()
+        if device_id in missing_ids
+    ]
+    added = flow_db.add_devices_bulk(new_rows)
+    print(f"✅ Added {added} device(s), skipped {len(DEVICES) - len(missing_ids)} existing")
+
     all_devices = flow_db.get_devices()
     print(f"\n📝 Total devices: {len(all_devices)}\n")
     
@@ -56,8 +54,7 @@ def setup_auth():
         admin_username = input("Admin username (default: 'admin'): ").strip() or "admin"
         
         # Check if user exists
-        existing_user = auth_db.authenticate_user(admin_username, "")
-        if existing_user:
+        if auth_db.user_exists(admin_username):
             print(f"⚠️  User '{admin_username}' already exists")
             retry = input("Create different user? (y/n): ").lower()
             if retry != 'y':
@@ -225,7 +225,8 @@ def is_authenticated() -> bool:
 
 def is_admin() -> bool:
     """Check if current user is admin."""
-    return is_authenticated() and st.session_state.user.get('role') == 'admin'
+    user = st.session_state.get('user')
+    return user is not None and user.get('role') == 'admin'
 
 
 def get_current_user() -> dict:
@@ -263,8 +264,8 @@ def render_auth_header():
     with st.sidebar:
         st.markdown("<div style='height: 0.25rem'></div>", unsafe_allow_html=True)
 
-        if is_authenticated():
-            user = get_current_user()
+        user = st.session_state.get('user')
+        if user is not None:
             role = user.get('role', 'user')
             role_label = "Administrator" if role == "admin" else "User"
             initial = user['username'][0].upper() if user.get('username') else "?"
@@ -300,7 +301,7 @@ def render_auth_header():
 
             # Navigation links
             st.markdown("<div style='height: 0.25rem'></div>", unsafe_allow_html=True)
-            if is_admin():
+            if role == "admin":
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("Admin", width="stretch", key="nav_admin"):
@@ -325,19 +326,34 @@ def render_auth_header():
             )
 
 
+@st.cache_data(ttl=60)
+def _user_device_ids(db_path: str, user_id: int, _auth_db: AuthDatabase) -> frozenset:
+    """Device IDs assigned to *user_id*, cached to spare a query on every rerun.
+
+    Keyed on the auth database path and the user; ``_auth_db`` itself is
+    not hashed.
+    """
+    return frozenset(_auth_db.get_user_devices(user_id))
+
+
+def clear_user_device_cache():
+    """Drop cached device assignments after an admin assigns or removes a site."""
+    _user_device_ids.clear()
+
+
 def filter_devices_for_user(all_devices: list) -> list:
     """Filter devices based on user's access rights."""
-    if not is_authenticated():
+    user = st.session_state.get('user')
+    if user is None:
         return []
 
-    user = get_current_user()
-
     # Admins see all devices
-    if is_admin():
+    if user.get('role') == 'admin':
         return all_devices
 
     # Regular users only see assigned devices
-    user_device_ids = st.session_state.auth_db.get_user_devices(user['user_id'])
+    auth_db = st.session_state.auth_db
+    user_device_ids = _user_device_ids(auth_db.db_path, user['user_id'], auth_db)
     return [d for d in all_devices if d.get('device_id') in user_device_ids]
 
 
@@ -29,6 +29,7 @@ async def test_extraction():
     device_selectors = device_info.get("selectors", None)
     
     data = await scraper.fetch_monitor_data(MONITOR_URL, device_selectors)
+    await scraper.aclose()
     
     if not data:
         print("❌ Failed to fetch data!")
@@ -84,18 +85,21 @@ async def test_extraction():
         velocity_mps = page_data.get('velocity_mps') or page_data.get('velocity')
         flow_lps = page_data.get('flow_lps') or page_data.get('flow')
     
-    stored = scraper.store_measurement(
-        device_id=device_id,
-        device_name=device_name,
-        depth_mm=depth_mm,
-        velocity_mps=velocity_mps,
-        flow_lps=flow_lps
-    )
-    
-    if stored:
-        print("✅ Data stored successfully!")
+    if depth_mm is None and velocity_mps is None and flow_lps is None:
+        print("ℹ️  No valid numeric fields, skipping store")
     else:
-        print("ℹ️  No changes detected or data already in database")
+        stored = scraper.store_measurement(
+            device_id=device_id,
+            device_name=device_name,
+            depth_mm=depth_mm,
+            velocity_mps=velocity_mps,
+            flow_lps=flow_lps
+        )
+        
+        if stored:
+            print("✅ Data stored successfully!")
+        else:
+            print("ℹ️  No changes detected or data already in database")
     
     print()
     print("=" * 60)
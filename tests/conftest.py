@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the project modules importable when pytest is run from any directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,25 @@
+"""Tests for AuthDatabase against a temporary SQLite file."""
+
+import pytest
+
+from auth import AuthDatabase
+
+
+@pytest.fixture
+def auth_db(tmp_path):
+    return AuthDatabase(str(tmp_path / "auth.db"))
+
+
+def test_user_exists(auth_db):
+    assert not auth_db.user_exists("operator")
+    assert auth_db.create_user("operator", "operator@example.com", "correct-horse", role="user")
+
+    assert auth_db.user_exists("operator")
+    assert not auth_db.user_exists("someone-else")
+    # The old check, authenticate_user(name, ""), never found an existing user
+    assert auth_db.authenticate_user("operator", "") is None
+
+
+def test_user_exists_sees_seeded_admin(auth_db):
+    # init_auth_tables seeds the default admin account
+    assert auth_db.user_exists("admin")
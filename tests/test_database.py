@@ -0,0 +1,35 @@
+"""Tests for FlowDatabase write paths against a temporary SQLite file."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from database import FlowDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    return FlowDatabase(str(tmp_path / "data" / "flow_data.db"))
+
+
+def test_add_device_measurement_upserts_device_once(db):
+    t1 = datetime(2024, 1, 1, 0, 0, tzinfo=timezone.utc)
+    t2 = datetime(2024, 1, 1, 0, 1, tzinfo=timezone.utc)
+    assert db.add_device_measurement("FIT100", "Main Inflow", t1, 120.0, 0.4, 8.0)
+    assert db.add_device_measurement("FIT100", "Main Inflow", t2, 121.0, 0.5, 8.5)
+
+    assert db.get_device_count() == 1
+    assert db.get_measurement_count() == 2
+    latest = db.get_latest_measurement()
+    assert latest["device_id"] == "FIT100"
+    assert latest["depth_mm"] == 121.0
+
+
+def test_add_devices_bulk_ignores_existing_devices(db):
+    assert db.add_devices_bulk([]) == 0
+    assert db.add_devices_bulk([("FIT100", "Main Inflow", ""), ("FIT200", "Outflow", "Site B")]) == 2
+    # FIT200 already exists and must keep its original name
+    assert db.add_devices_bulk([("FIT200", "Renamed", ""), ("FIT300", "Bypass", "")]) == 1
+
+    devices = {d["device_id"]: d["device_name"] for d in db.get_devices()}
+    assert devices == {"FIT100": "Main Inflow", "FIT200": "Outflow", "FIT300": "Bypass"}
@@ -0,0 +1,31 @@
+"""Tests for report calculations."""
+
+import pandas as pd
+import pytest
+
+from reporting import ReportSelections, compute_calculations, prepare_frame
+
+
+def _volume(seconds, flows):
+    df = pd.DataFrame({
+        "timestamp": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(seconds, unit="s"),
+        "flow_lps": flows,
+    })
+    sel = ReportSelections(
+        variables=["flow_lps"], calculations=["volume"],
+        device_name="FIT100", time_window_hours=1,
+    )
+    return compute_calculations(prepare_frame(df), sel)["flow_lps"]
+
+
+def test_volume_is_trapezoidal_on_uneven_series():
+    # (10+20)/2*60 + (20+30)/2*120 + (30+30)/2*420; mean x elapsed would give 13500
+    stats = _volume([0, 60, 180, 600], [10.0, 20.0, 30.0, 30.0])
+    assert stats["volume_liters"] == pytest.approx(16500.0)
+    assert stats["volume_m3"] == pytest.approx(16.5)
+
+
+def test_volume_counts_reverse_flow_and_skips_missing_samples():
+    # The NaN sample at 300 s is dropped; negative flow is not clipped to zero
+    stats = _volume([0, 60, 180, 300, 600], [10.0, 20.0, -30.0, float("nan"), -30.0])
+    assert stats["volume_liters"] == pytest.approx(900.0 - 600.0 - 12600.0)
@@ -0,0 +1,324 @@
+"""Tests for the scraper's parsing, change-detection and fetch logic."""
+
+import asyncio
+import base64
+import json
+import math
+import time
+
+import pytest
+
+import scraper as scraper_module
+from scraper import MONITOR_URL, DataScraper, _first_number, _parse_monitor_url, _reading_key
+
+
+def test_reading_key_quantises_to_sensor_resolution():
+    data = {"depth_mm": 133.4, "velocity_mps": 0.423, "flow_lps": 12.34}
+    assert _reading_key(data) == (133, 42, 123)
+
+
+def test_reading_key_maps_non_finite_values_to_none():
+    data = {"depth_mm": math.nan, "velocity_mps": math.inf, "flow_lps": -math.inf}
+    assert _reading_key(data) == (None, None, None)
+    assert _reading_key({"depth_mm": 5.0}) == (5, None, None)
+
+
+def test_load_state_keeps_devices_with_nan_readings(tmp_path):
+    state_file = tmp_path / ".scraper_state.json"
+    # json.dump writes NaN literals by default, so the state file can hold them
+    state_file.write_text(
+        '{"FIT100": {"depth_mm": NaN, "velocity_mps": 0.5, "flow_lps": 1.0},'
+        ' "FIT200": {"depth_mm": 10.0, "velocity_mps": 0.2, "flow_lps": 3.0}}'
+    )
+    scraper = DataScraper.__new__(DataScraper)
+    scraper.state_file = state_file
+
+    state = scraper._load_state()
+
+    assert state["FIT100"]["_key"] == (None, 50, 10)
+    assert state["FIT200"]["_key"] == (10, 20, 30)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("133mm", 133.0),
+    ("133 mm", 133.0),
+    ("  87mm  ", 87.0),
+    ("0.42m/s", 0.42),
+    ("-0.42 m/s", -0.42),
+    ("-0.42", -0.42),
+    ("12.5L/s", 12.5),
+    ("0.000 L/s", 0.0),
+    ("5.", 5.0),
+    ("1.2.3", 1.2),
+    ("Flow: -1.5 L/s", -1.5),
+    ("Depth-133", 133.0),
+    ("--", None),
+    ("N/A", None),
+    ("mm", None),
+    ("", None),
+])
+def test_first_number(text, expected):
+    assert _first_number(text) == expected
+
+
+def _share_keystream(share_param, pwd="usr.cn"):
+    """Seed and step function of the share-link LCG, as in the original decryption."""
+    prand = "".join(str(ord(c)) for c in pwd)
+    s_pos = len(prand) // 5
+    mult = int(prand[s_pos] + prand[2 * s_pos] + prand[3 * s_pos] + prand[4 * s_pos] + prand[5 * s_pos])
+    incr = round(len(pwd) / 2)
+    modu = 2 ** 31 - 1
+    prand = prand + str(int(share_param[-8:], 16))
+    while len(prand) > 10:
+        prand = str(int(prand[:10]) + int(prand[10:]))
+    prand = (mult * int(prand) + incr) % modu
+    while True:
+        yield int((prand / modu) * 255)
+        prand = (mult * prand + incr) % modu
+
+
+def _reference_decrypt(share_param):
+    """The original pure-Python token decryption."""
+    core = share_param[:-8]
+    stream = _share_keystream(share_param)
+    chars = [chr(int(core[i:i + 2], 16) ^ next(stream)) for i in range(0, len(core), 2)]
+    return json.loads(base64.b64decode("".join(chars)).decode("utf-8")).get("token")
+
+
+def _encrypt_share(payload, salt="0badc0de"):
+    plain = base64.b64encode(json.dumps(payload).encode("utf-8"))
+    stream = _share_keystream("0" * 8 + salt)
+    return "".join(f"{b ^ next(stream):02x}" for b in plain) + salt
+
+
+def test_decrypt_share_token_matches_reference_on_monitor_url():
+    share, _ = _parse_monitor_url(MONITOR_URL)
+    scraper = DataScraper.__new__(DataScraper)
+    token = scraper._decrypt_share_token(share)
+    assert token is not None
+    assert token == _reference_decrypt(share)
+
+
+def test_decrypt_share_token_round_trip():
+    share = _encrypt_share({"token": "abc.def-ghi_123", "uid": 88831})
+    scraper = DataScraper.__new__(DataScraper)
+    assert scraper._decrypt_share_token(share) == "abc.def-ghi_123"
+    assert scraper._decrypt_share_token("") is None
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class _FakeSession:
+    def __init__(self, payload):
+        self.payload = payload
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.bodies.append(json.loads(data))
+        return _FakeResponse(self.payload)
+
+
+def _latest_points(entries, ids=(11, 22, 33)):
+    scraper = DataScraper.__new__(DataScraper)
+    scraper._session = _FakeSession({"status": 0, "data": {"list": entries}})
+    values = scraper._fetch_latest_points("0000088831000010", list(ids), {"token": "t"})
+    requested = [p["dataPointId"] for p in scraper._session.bodies[0]["dataPoints"]]
+    assert requested == list(ids)
+    return values
+
+
+def test_fetch_latest_points_matches_by_data_point_id():
+    entries = [
+        {"dataPointId": 33, "list": [{"value": "3.5"}]},
+        {"dataPointId": 11, "list": [{"value": 1}]},
+    ]
+    assert _latest_points(entries) == {33: 3.5, 11: 1.0}
+
+
+def test_fetch_latest_points_maps_id_less_entries_by_position_on_full_response():
+    entries = [{"list": [{"value": 1}]}, {"list": [{"value": 2}]}, {"list": [{"value": 3}]}]
+    assert _latest_points(entries) == {11: 1.0, 22: 2.0, 33: 3.0}
+
+
+def test_fetch_latest_points_skips_id_less_entries_on_partial_response():
+    entries = [{"list": [{"value": 2}]}, {"dataPointId": 33, "list": [{"value": 3}]}]
+    assert _latest_points(entries) == {33: 3.0}
+
+
+def test_fetch_latest_points_expired_token():
+    scraper = DataScraper.__new__(DataScraper)
+    scraper._session = _FakeSession({"status": 4010})
+    assert scraper._fetch_latest_points("dev", [11], {"token": "t"}) is None
+
+
+SELECTORS = {"depth_mm": "#depth", "velocity_mps": "#velocity", "flow_lps": "#flow"}
+API_READING = {"depth_mm": 120.0, "velocity_mps": 0.4, "flow_lps": 8.0}
+PAGE_RESULT = {"data": {"depth_mm": 121.0}, "title": None, "timestamp": None}
+
+
+@pytest.fixture
+def race_scraper(monkeypatch):
+    """A DataScraper whose three fetch paths are stubs recording their calls."""
+    monkeypatch.setattr(scraper_module, "API_HEDGE_DELAY", 0.05)
+    scraper = DataScraper.__new__(DataScraper)
+    scraper.tz = scraper_module._TZ
+    scraper.force_requests = False
+    scraper.calls = []
+    scraper.api_delay = 0.0
+    scraper.api_result = API_READING
+    scraper.browser_delay = 0.0
+    scraper.browser_result = PAGE_RESULT
+    scraper.browser_cancelled = False
+    scraper.requests_result = {}
+
+    def fake_api(url):
+        scraper.calls.append("api")
+        time.sleep(scraper.api_delay)
+        return scraper.api_result
+
+    async def fake_browser(url, selectors):
+        scraper.calls.append("browser")
+        try:
+            await asyncio.sleep(scraper.browser_delay)
+        except asyncio.CancelledError:
+            scraper.browser_cancelled = True
+            raise
+        return scraper.browser_result
+
+    def fake_requests(url, selectors):
+        scraper.calls.append("requests")
+        return scraper.requests_result
+
+    scraper._fetch_via_api = fake_api
+    scraper._fetch_via_playwright = fake_browser
+    scraper._fetch_via_requests = fake_requests
+    return scraper
+
+
+def _fetch(scraper):
+    return asyncio.run(scraper.fetch_monitor_data(MONITOR_URL, SELECTORS))
+
+
+def test_api_answer_before_hedge_delay_skips_browser(race_scraper):
+    result = _fetch(race_scraper)
+    assert result["data"] == API_READING
+    assert race_scraper.calls == ["api"]
+
+
+def test_slow_api_starts_browser_after_hedge_delay(race_scraper):
+    race_scraper.api_delay = 0.5
+    result = _fetch(race_scraper)
+    # The browser started while the API was still running and won the race
+    assert result == PAGE_RESULT
+    assert race_scraper.calls == ["api", "browser"]
+
+
+def test_losing_browser_task_is_cancelled(race_scraper):
+    race_scraper.api_delay = 0.2
+    race_scraper.browser_delay = 5.0
+    result = _fetch(race_scraper)
+    assert result["data"] == API_READING
+    assert race_scraper.calls == ["api", "browser"]
+    assert race_scraper.browser_cancelled
+
+
+def test_page_without_values_skips_requests_fallback(race_scraper):
+    race_scraper.api_result = {}
+    race_scraper.browser_result = {}
+    race_scraper.requests_result = {"depth_mm": 1.0}
+    assert _fetch(race_scraper) is None
+    assert race_scraper.calls == ["api", "browser"]
+
+
+def test_browser_failure_uses_requests_fallback(race_scraper):
+    race_scraper.api_result = {}
+    race_scraper.browser_result = None
+    race_scraper.requests_result = {"depth_mm": 99.0}
+    result = _fetch(race_scraper)
+    assert result["data"] == {"depth_mm": 99.0}
+    assert race_scraper.calls == ["api", "browser", "requests"]
+
+
+class _FakePage:
+    def __init__(self, texts, fail_goto=False):
+        self.texts = texts
+        self.fail_goto = fail_goto
+
+    async def goto(self, url, **kwargs):
+        if self.fail_goto:
+            raise RuntimeError("net::ERR_CONNECTION_RESET")
+
+    async def wait_for_function(self, *args, **kwargs):
+        pass
+
+    async def title(self):
+        return "Dashboard"
+
+    async def evaluate(self, script, arg):
+        return self.texts
+
+
+class _FakeContext:
+    def __init__(self, page):
+        self.page = page
+        self.closed = False
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self, page):
+        self.contexts = []
+        self.page = page
+
+    async def new_context(self, **kwargs):
+        context = _FakeContext(self.page)
+        self.contexts.append(context)
+        return context
+
+
+def _playwright_fetch(page):
+    scraper = DataScraper.__new__(DataScraper)
+    scraper.tz = scraper_module._TZ
+    browser = _FakeBrowser(page)
+
+    async def run():
+        scraper._page_slots = asyncio.Semaphore(1)
+
+        async def ensure_browser():
+            return browser
+
+        scraper._ensure_browser = ensure_browser
+        return await scraper._fetch_via_playwright(MONITOR_URL, SELECTORS)
+
+    result = asyncio.run(run())
+    assert all(c.closed for c in browser.contexts)
+    return result
+
+
+def test_playwright_fetch_returns_values():
+    page = _FakePage({"depth_mm": "133mm", "velocity_mps": "0.42m/s", "flow_lps": None})
+    result = _playwright_fetch(page)
+    assert result["data"] == {"depth_mm": 133.0, "velocity_mps": 0.42}
+
+
+def test_playwright_fetch_returns_empty_dict_when_page_has_no_values():
+    page = _FakePage({"depth_mm": "--", "velocity_mps": "N/A", "flow_lps": None})
+    assert _playwright_fetch(page) == {}
+
+
+def test_playwright_fetch_returns_none_on_failure():
+    assert _playwright_fetch(_FakePage({}, fail_goto=True)) is None